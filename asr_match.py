@@ -0,0 +1,50 @@
+from typing import Any
+
+import click
+
+from tools.asr_match_pipeline import AsrMatchPipeline
+from tools.asr_options import asr_options, build_pipeline_options
+from tools.sequence_aligner import MATCH_STRATEGIES
+
+
+@click.command(help='Run ASR and lyric matching in one pass, writing Minlabel JSON files directly.')
+@click.option('--language', type=click.Choice(['zh', 'en']), required=True,
+              help='Language code: zh=Chinese, en=English')
+@click.option('--wav_folder', required=True, help='Sliced wav file folder (*.wav).')
+@click.option('--lyric_folder', required=True, help='Folder containing lyric files (*.txt).')
+@click.option('--json_folder', required=True, help='Output folder for JSON files.')
+@click.option('--lab_folder', default=None, help='Also write the ASR lab files to this folder (optional).')
+@click.option('--diff_threshold', default=5, type=int, help='Difference threshold for printing (default: 5).')
+@click.option('--index/--no-index', 'use_index', default=True,
+              help='Search only around k-gram seeds from a per-lyric index, scanning every window when there are '
+                   'too few seeds (default: on).')
+@click.option('--strategy', default='window', type=click.Choice(MATCH_STRATEGIES),
+              help='window: score fixed-size windows; fitting: one semi-global alignment pass (default: window).')
+@asr_options
+def asr_match(
+        language: str,
+        wav_folder: str,
+        lyric_folder: str,
+        json_folder: str,
+        lab_folder: str,
+        diff_threshold: int,
+        use_index: bool,
+        strategy: str,
+        **options: Any
+) -> None:
+    pipeline = AsrMatchPipeline(
+        wav_folder=wav_folder,
+        lyric_folder=lyric_folder,
+        json_folder=json_folder,
+        language=language,
+        lab_folder=lab_folder,
+        diff_threshold=diff_threshold,
+        use_index=use_index,
+        strategy=strategy,
+        **build_pipeline_options(**options)
+    )
+    pipeline.execute()
+
+
+if __name__ == '__main__':
+    asr_match()
@@ -0,0 +1,46 @@
+import click
+
+from tools.asr_backends import BackendFactory
+from tools.asr_server import AsrServer, AsrService
+
+
+@click.command(help='Keep an ASR backend loaded and serve fun_asr.py clients over localhost HTTP.')
+@click.option('--language', type=click.Choice(['zh', 'en']), required=True,
+              help='Language code: zh=Chinese, en=English')
+@click.option('--host', default=AsrServer.DEFAULT_HOST, show_default=True, help='Address to listen on.')
+@click.option('--port', default=AsrServer.DEFAULT_PORT, type=int, show_default=True, help='Port to listen on.')
+@click.option('--threads', default=0, type=int, show_default=True,
+              help='Intra-op threads of the model (0 = library default).')
+@click.option('--backend', default='funasr', type=click.Choice(BackendFactory.get_supported_backends()),
+              show_default=True, help='ASR backend.')
+@click.option('--onnx_model_dir', default=None, type=str, help='Exported Paraformer model folder (onnx backend).')
+@click.option('--onnx_quantize', is_flag=True, help='Use the quantized ONNX model (onnx backend).')
+@click.option('--batch_size', default=1, type=int, show_default=True, help='Inference batch size (onnx backend).')
+@click.option('--verbose', is_flag=True, help='Log every request.')
+def asr_server(
+        language: str,
+        host: str,
+        port: int,
+        threads: int,
+        backend: str,
+        onnx_model_dir: str,
+        onnx_quantize: bool,
+        batch_size: int,
+        verbose: bool
+) -> None:
+    backend_options = {}
+    if backend == 'onnx':
+        backend_options = {'model_dir': onnx_model_dir, 'quantize': onnx_quantize, 'batch_size': batch_size}
+    asr_backend = BackendFactory.create_backend(backend, language, threads=threads, **backend_options)
+    server = AsrServer(AsrService(asr_backend), host=host, port=port, verbose=verbose)
+    print(f"ASR server listening on {server.url}, language: {language}, backend: {backend}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    asr_server()
@@ -0,0 +1,70 @@
+import random
+import time
+from typing import Callable, List, Tuple
+
+import click
+
+from tools.sequence_aligner import SequenceAligner
+
+Pairs = List[Tuple[List[int], List[int]]]
+
+
+def make_pairs(count: int, length: int, vocabulary: int, seed: int = 0) -> Pairs:
+    # Window-like pairs: the text is a noisy copy of the pattern, 30% longer, as in _scan_windows.
+    generator = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        pattern = [generator.randrange(vocabulary) for _ in range(length)]
+        text = [token if generator.random() < 0.7 else generator.randrange(vocabulary) for token in pattern]
+        text += [generator.randrange(vocabulary) for _ in range(int(length * 0.3))]
+        pairs.append((pattern, text))
+    return pairs
+
+
+def measure(function: Callable[[List[int], List[int]], int], pairs: Pairs, repeat: int) -> Tuple[float, List[int]]:
+    best = float('inf')
+    results: List[int] = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        results = [function(pattern, text) for pattern, text in pairs]
+        best = min(best, time.perf_counter() - start_time)
+    return best, results
+
+
+@click.command(help='Compare the bit-parallel and cutoff edit distance kernels with the full versions.')
+@click.option('--count', default=300, type=int, help='Sequence pairs (default: 300).')
+@click.option('--length', default=40, type=int, help='Pattern length in tokens (default: 40).')
+@click.option('--vocabulary', default=400, type=int, help='Distinct token ids (default: 400).')
+@click.option('--repeat', default=3, type=int, help='Repetitions; the best run is reported (default: 3).')
+def bench_alignment(count: int, length: int, vocabulary: int, repeat: int) -> None:
+    pairs = make_pairs(count, length, vocabulary)
+    aligner = SequenceAligner()
+    weighted = SequenceAligner(deletion_cost=2, insertion_cost=1, substitution_cost=3)
+
+    kernels = [
+        ('lcs', SequenceAligner.compute_lcs_length_dp, SequenceAligner.compute_lcs_length),
+        ('edit distance', aligner.compute_edit_distance_dp, aligner.compute_edit_distance),
+        ('weighted edit distance (DP fallback)', weighted.compute_edit_distance_dp, weighted.compute_edit_distance),
+    ]
+    # With a cutoff only "at most cutoff, and how much" matters, so both sides are clamped to cutoff + 1.
+    cutoff = length // 4
+    kernels += [
+        (f'edit distance, cutoff {cutoff}',
+         lambda pattern, text: min(aligner.compute_edit_distance(pattern, text), cutoff + 1),
+         lambda pattern, text: min(aligner.compute_edit_distance(pattern, text, cutoff), cutoff + 1)),
+        (f'weighted edit distance, cutoff {cutoff}',
+         lambda pattern, text: min(weighted.compute_edit_distance_dp(pattern, text), cutoff + 1),
+         lambda pattern, text: min(weighted.compute_edit_distance_dp(pattern, text, cutoff), cutoff + 1)),
+    ]
+    print(f'{count} pairs, pattern length {length}, vocabulary {vocabulary}')
+    for name, reference, candidate in kernels:
+        reference_seconds, expected = measure(reference, pairs, repeat)
+        candidate_seconds, actual = measure(candidate, pairs, repeat)
+        if actual != expected:
+            raise click.ClickException(f'{name}: results differ from the reference')
+        print(f'{name:38s} ref {reference_seconds * 1000:8.1f} ms   new {candidate_seconds * 1000:8.1f} ms   '
+              f'({reference_seconds / candidate_seconds:.1f}x)')
+
+
+if __name__ == '__main__':
+    bench_alignment()
@@ -0,0 +1,56 @@
+import glob
+import os
+import time
+from typing import List, Optional
+
+import click
+
+from tools.asr_backends import BackendFactory
+from tools.asr_options import build_pipeline_options
+from tools.audio_io import SAMPLE_RATE, load_audio
+
+
+@click.command(help='Run an ASR backend over a wav folder, batched and one clip at a time, and compare the results.')
+@click.option('--wav_folder', required=True, help='Folder containing sliced wav files (*.wav).')
+@click.option('--language', required=True, type=click.Choice(['zh', 'en']), help='Language: zh, en.')
+@click.option('--backend', default='stub', type=click.Choice(BackendFactory.get_supported_backends()),
+              help='ASR backend (default: stub).')
+@click.option('--batch_size', default=4, type=int, help='Clips per batched call (default: 4).')
+@click.option('--onnx_model_dir', default=None, type=str, help='Exported Paraformer model folder (onnx backend).')
+@click.option('--onnx_quantize', is_flag=True, help='Use the quantized ONNX model (onnx backend).')
+def bench_backends(wav_folder: str, language: str, backend: str, batch_size: int, onnx_model_dir: Optional[str],
+                   onnx_quantize: bool) -> None:
+    wav_paths = sorted(glob.glob(os.path.join(wav_folder, '*.wav')))
+    if not wav_paths:
+        raise click.ClickException(f'No wav files in {wav_folder}')
+    audio_list = [load_audio(wav_path) for wav_path in wav_paths]
+    options = build_pipeline_options(backend=backend, batch_size=batch_size, onnx_model_dir=onnx_model_dir,
+                                     onnx_quantize=onnx_quantize)
+    asr_backend = BackendFactory.create_backend(backend, language, **options['backend_options'])
+    asr_backend.load()
+
+    start_time = time.perf_counter()
+    batched: List[Optional[str]] = []
+    for first in range(0, len(audio_list), batch_size):
+        batched += asr_backend.transcribe(audio_list[first:first + batch_size])
+    batched_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    single = [asr_backend.transcribe([audio])[0] for audio in audio_list]
+    single_seconds = time.perf_counter() - start_time
+
+    missing = [wav_path for wav_path, batched_text, single_text in zip(wav_paths, batched, single)
+               if batched_text is None or single_text is None]
+    if missing:
+        raise click.ClickException(f'No result for {len(missing)} clips, e.g. {missing[0]}')
+    # Padding a batch may legitimately change a model's output, so differences are reported rather than fatal.
+    differing = sum(1 for batched_text, single_text in zip(batched, single) if batched_text != single_text)
+    audio_seconds = sum(len(audio) for audio in audio_list) / SAMPLE_RATE
+    print(f'{len(audio_list)} clips, {audio_seconds:.1f}s of audio, backend {backend}')
+    print(f'batch size {batch_size:3d}: {batched_seconds:8.3f}s, RTF {batched_seconds / audio_seconds:.4f}x')
+    print(f'batch size {1:3d}: {single_seconds:8.3f}s, RTF {single_seconds / audio_seconds:.4f}x')
+    print(f'{differing} of {len(audio_list)} clips transcribed differently when batched')
+
+
+if __name__ == '__main__':
+    bench_backends()
@@ -0,0 +1,117 @@
+import random
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+
+import click
+
+from tools.sequence_aligner import EditOperation, SequenceAligner, Token
+
+Alignment = Tuple[int, List[Token], List[Token]]
+
+
+def legacy_compute_alignment(aligner: SequenceAligner, seq1: List[Token], seq2: List[Token]) -> Alignment:
+    # The full dp / bt matrices the compact backtrace replaced, kept as the reference.
+    len1, len2 = len(seq1), len(seq2)
+
+    dp = [[0] * (len2 + 1) for _ in range(len1 + 1)]
+    bt = [[EditOperation.MATCH] * (len2 + 1) for _ in range(len1 + 1)]
+
+    for i in range(1, len1 + 1):
+        dp[i][0] = i * aligner.deletion_cost
+        bt[i][0] = EditOperation.DELETE
+
+    for j in range(1, len2 + 1):
+        dp[0][j] = j * aligner.insertion_cost
+        bt[0][j] = EditOperation.INSERT
+
+    for i in range(1, len1 + 1):
+        s1_char = seq1[i - 1]
+        for j in range(1, len2 + 1):
+            s2_char = seq2[j - 1]
+
+            if s1_char == s2_char:
+                dp[i][j] = dp[i - 1][j - 1]
+                bt[i][j] = EditOperation.MATCH
+            else:
+                sub_cost = dp[i - 1][j - 1] + aligner.substitution_cost
+                del_cost = dp[i - 1][j] + aligner.deletion_cost
+                ins_cost = dp[i][j - 1] + aligner.insertion_cost
+
+                min_cost = sub_cost
+                op = EditOperation.SUBSTITUTE
+                if del_cost < min_cost:
+                    min_cost = del_cost
+                    op = EditOperation.DELETE
+                if ins_cost < min_cost:
+                    min_cost = ins_cost
+                    op = EditOperation.INSERT
+
+                dp[i][j] = min_cost
+                bt[i][j] = op
+
+    i, j = len1, len2
+    res1: List[Token] = []
+    res2: List[Token] = []
+    while i > 0 or j > 0:
+        op = bt[i][j]
+        if i > 0 and j > 0 and op in (EditOperation.MATCH, EditOperation.SUBSTITUTE):
+            res1.append(seq1[i - 1])
+            res2.append(seq2[j - 1])
+            i -= 1
+            j -= 1
+        elif i > 0 and (j == 0 or op == EditOperation.DELETE):
+            res1.append(seq1[i - 1])
+            res2.append('-')
+            i -= 1
+        else:
+            res1.append('-')
+            res2.append(seq2[j - 1])
+            j -= 1
+    return dp[len1][len2], res1[::-1], res2[::-1]
+
+
+def make_pair(generator: random.Random, length: int, vocabulary: int) -> Tuple[List[Token], List[Token]]:
+    # A noisy clip against a window 30% longer, as _build_match_from_alignment sees them.
+    clip: List[Token] = [generator.randrange(vocabulary) for _ in range(length)]
+    window: List[Token] = [token if generator.random() < 0.7 else generator.randrange(vocabulary) for token in clip]
+    window += [generator.randrange(vocabulary) for _ in range(int(length * 0.3))]
+    return clip, window
+
+
+def measure(function: Callable[[], Alignment], repeat: int) -> Tuple[float, int, Optional[Alignment]]:
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start_time)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+@click.command(help='Compare the compact compute_alignment backtrace with the full-matrix version.')
+@click.option('--lengths', default='50,200,800', help='Comma-separated clip lengths in tokens (default: 50,200,800).')
+@click.option('--vocabulary', default=400, type=int, help='Distinct token ids (default: 400).')
+@click.option('--repeat', default=3, type=int, help='Repetitions; the best run is reported (default: 3).')
+def bench_backtrace(lengths: str, vocabulary: int, repeat: int) -> None:
+    generator = random.Random(0)
+    aligners = [('unit costs', SequenceAligner()),
+                ('2/1/3 costs', SequenceAligner(deletion_cost=2, insertion_cost=1, substitution_cost=3))]
+    for length in (int(value) for value in lengths.split(',')):
+        clip, window = make_pair(generator, length, vocabulary)
+        for name, aligner in aligners:
+            legacy_seconds, legacy_peak, expected = measure(
+                lambda: legacy_compute_alignment(aligner, clip, window), repeat)
+            seconds, peak, actual = measure(lambda: aligner.compute_alignment(clip, window), repeat)
+            if actual != expected:
+                raise click.ClickException(f'length {length}, {name}: alignments differ from the reference')
+            print(f'length {length:5d} {name:12s} time {legacy_seconds * 1000:9.1f} -> {seconds * 1000:9.1f} ms   '
+                  f'peak {legacy_peak / 2 ** 20:8.2f} -> {peak / 2 ** 20:8.2f} MiB')
+
+
+if __name__ == '__main__':
+    bench_backtrace()
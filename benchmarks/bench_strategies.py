@@ -0,0 +1,78 @@
+import glob
+import io
+import time
+from contextlib import redirect_stdout
+from typing import List, Optional, Tuple
+
+import click
+
+from tools.lyric_matcher import LyricMatchingPipeline, ProcessResult
+from tools.sequence_aligner import MatchStrategy
+
+CONFIGURATIONS: List[Tuple[str, bool]] = [
+    (MatchStrategy.WINDOW, False),
+    (MatchStrategy.WINDOW, True),
+    (MatchStrategy.FITTING, False),
+    (MatchStrategy.FITTING, True),
+]
+
+
+@click.command(help='Compare the window and fitting match strategies, with and without the lyric index.')
+@click.option('--lyric_folder', required=True, help='Folder containing lyric files (*.txt).')
+@click.option('--lab_folder', required=True, help='Folder containing ASR result files (*.lab).')
+@click.option('--language', required=True, type=click.Choice(['zh', 'en']), help='Language: zh, en.')
+@click.option('--repeat', default=3, type=int, help='Repetitions; the best run is reported (default: 3).')
+def bench_strategies(lyric_folder: str, lab_folder: str, language: str, repeat: int) -> None:
+    pipeline = LyricMatchingPipeline(lyric_folder=lyric_folder, lab_folder=lab_folder, json_folder='',
+                                     language=language)
+    with redirect_stdout(io.StringIO()):
+        lyric_dict = pipeline.load_all_lyrics()
+    lab_paths = [lab_path for lab_path in sorted(glob.glob(f'{lab_folder}/*{pipeline.LAB_EXTENSION}'))
+                 if pipeline.extract_lyric_name(lab_path) in lyric_dict]
+    contents = [pipeline.read_lab(lab_path)[0] or '' for lab_path in lab_paths]
+    asr_results = pipeline.matcher.process_asr_contents(contents)
+    aligner = pipeline.matcher.aligner
+
+    def run() -> List[Optional[ProcessResult]]:
+        results = []
+        for lab_path, (asr_text, asr_phonetic) in zip(lab_paths, asr_results):
+            lab_name = pipeline.extract_filename_without_extension(lab_path)
+            lyric_data = lyric_dict[pipeline.extract_lyric_name(lab_path)]
+            results.append(pipeline.match_asr_result(lab_name, asr_text, asr_phonetic, lyric_data))
+        return results
+
+    runs: List[Tuple[str, bool, float, List[Optional[ProcessResult]]]] = []
+    for strategy, use_index in CONFIGURATIONS:
+        pipeline.strategy = strategy
+        pipeline.use_index = use_index
+        seconds = float('inf')
+        results: List[Optional[ProcessResult]] = []
+        for _ in range(repeat):
+            with redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                results = run()
+                seconds = min(seconds, time.perf_counter() - start_time)
+        runs.append((strategy, use_index, seconds, results))
+
+    def matched_ids(result: Optional[ProcessResult]) -> List[int]:
+        return result.matched_phonetic_ids if result else []
+
+    # Quality: edit distance between the ASR result and the lyric tokens it was matched to, over the labs
+    # every configuration matched, so the averages are comparable.
+    common = [position for position in range(len(lab_paths))
+              if all(matched_ids(results[position]) for _, _, _, results in runs)]
+    reference = runs[0][3]
+    print(f'{len(lab_paths)} labs, {len(lyric_dict)} lyrics, {len(common)} matched by every configuration')
+    print(f'{"strategy":10s} {"index":6s} {"time":>11s} {"no match":>9s} {"mean edit":>10s} {"same as first":>14s}')
+    for strategy, use_index, seconds, results in runs:
+        no_match = sum(1 for result in results if not matched_ids(result))
+        distances = [aligner.compute_edit_distance(results[position].asr_phonetic_ids,  # type: ignore[union-attr]
+                                                   matched_ids(results[position])) for position in common]
+        mean_distance = sum(distances) / len(distances) if distances else 0.0
+        same = sum(1 for result, expected in zip(results, reference) if matched_ids(result) == matched_ids(expected))
+        print(f'{strategy:10s} {"on" if use_index else "off":6s} {seconds * 1000:8.1f} ms {no_match:9d} '
+              f'{mean_distance:10.2f} {same:14d}')
+
+
+if __name__ == '__main__':
+    bench_strategies()
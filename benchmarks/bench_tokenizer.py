@@ -0,0 +1,91 @@
+import glob
+import random
+import re
+import time
+from typing import Callable, List
+
+import click
+
+from tools.ZhG2p import is_hanzi, is_kana, is_letter, is_special_kana, is_special_letter
+from tools.language_processors import LanguageProcessor, ProcessorFactory
+
+
+def legacy_split_string(input_str: str) -> List[str]:
+    # The character loop the compiled tokenizer replaced, kept as the reference.
+    result = []
+    position = 0
+    while position < len(input_str):
+        current_char = input_str[position]
+        if is_letter(current_char) or is_special_letter(current_char):
+            start = position
+            while position < len(input_str) and (
+                    is_letter(input_str[position]) or is_special_letter(input_str[position])):
+                position += 1
+            result.append(input_str[start:position])
+        elif is_hanzi(current_char) or current_char.isdigit():
+            result.append(input_str[position])
+            position += 1
+        elif is_kana(current_char):
+            length = 2 if position + 1 < len(input_str) and is_special_kana(input_str[position + 1]) else 1
+            result.append(input_str[position:position + length])
+            position += length
+        else:
+            position += 1
+    return result
+
+
+def legacy_tokenize(processor: LanguageProcessor, text: str) -> List[str]:
+    cleaned = re.sub(rf'[^{processor._allowed_chars}]', '', text)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return legacy_split_string(cleaned.lower() if processor.language_code == 'en' else cleaned)
+
+
+def make_texts(language: str, count: int, length: int) -> List[str]:
+    generator = random.Random(0)
+    if language == 'zh':
+        alphabet = list('我你他的是在有不这人们来到时大地为子中上说生国年着就那和要长行重') + list('，。！？ \n')
+    else:
+        alphabet = list('abcdefghijklmnopqrstuvwxyz') * 3 + list(" ,.!?'-\n") + ['’', '1']
+    return [''.join(generator.choice(alphabet) for _ in range(length)) for _ in range(count)]
+
+
+def measure(function: Callable[[str], List[str]], texts: List[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for text in texts:
+            function(text)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+@click.command(help='Compare the compiled tokenizer with the old clean_text + character loop.')
+@click.option('--language', default='zh', type=click.Choice(['zh', 'en']), help='Language (default: zh).')
+@click.option('--text_folder', default=None, help='Optional folder of *.txt or *.lab files to tokenize.')
+@click.option('--count', default=2000, type=int, help='Synthetic texts when no folder is given (default: 2000).')
+@click.option('--length', default=200, type=int, help='Characters per synthetic text (default: 200).')
+@click.option('--repeat', default=5, type=int, help='Repetitions; the best run is reported (default: 5).')
+def bench_tokenizer(language: str, text_folder: str, count: int, length: int, repeat: int) -> None:
+    processor = ProcessorFactory.create_processor(language)
+    if text_folder:
+        texts = []
+        for path in glob.glob(f'{text_folder}/*.txt') + glob.glob(f'{text_folder}/*.lab'):
+            with open(path, 'r', encoding='utf-8') as file:
+                texts.append(file.read())
+    else:
+        texts = make_texts(language, count, length)
+
+    for text in texts:
+        if processor.tokenize(text) != legacy_tokenize(processor, text):
+            raise click.ClickException(f'Tokenizer output differs for: {text[:80]!r}')
+
+    characters = sum(len(text) for text in texts)
+    legacy_seconds = measure(lambda text: legacy_tokenize(processor, text), texts, repeat)
+    compiled_seconds = measure(processor.tokenize, texts, repeat)
+    print(f'{len(texts)} texts, {characters} characters, outputs identical')
+    print(f'legacy:   {legacy_seconds * 1000:.1f} ms')
+    print(f'compiled: {compiled_seconds * 1000:.1f} ms ({legacy_seconds / compiled_seconds:.1f}x)')
+
+
+if __name__ == '__main__':
+    bench_tokenizer()
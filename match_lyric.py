@@ -1,6 +1,7 @@
 import click
 
 from tools.lyric_matcher import LyricMatchingPipeline
+from tools.sequence_aligner import MATCH_STRATEGIES
 
 
 @click.command(help='Match original lyrics with ASR results and generate Minlabel JSON files')
@@ -10,12 +11,29 @@ from tools.lyric_matcher import LyricMatchingPipeline
 @click.option('--language', required=True, type=click.Choice(['zh', 'en']),
               help='Language: zh(Chinese), en(English).')
 @click.option('--diff_threshold', default=5, type=int, help='Difference threshold for printing (default: 5).')
+@click.option('--workers', default=1, type=int,
+              help='Matching processes; they share the dictionaries and lyrics through shared memory (default: 1).')
+@click.option('--index/--no-index', 'use_index', default=True,
+              help='Search only around k-gram seeds from a per-lyric index, scanning every window when there are '
+                   'too few seeds (default: on).')
+@click.option('--strategy', default='window', type=click.Choice(MATCH_STRATEGIES),
+              help='window: score fixed-size windows; fitting: one semi-global alignment pass (default: window).')
+@click.option('--locality', is_flag=True,
+              help='Process the slices of each song in order and search just after the previous slice first.')
+@click.option('--locality_threshold', default=0.3, type=float,
+              help='Highest edit distance per clip token accepted near the previous slice before the whole lyric '
+                   'is searched (default: 0.3).')
 def match_lyric(
         lyric_folder: str,
         lab_folder: str,
         json_folder: str,
         language: str,
-        diff_threshold: int
+        diff_threshold: int,
+        workers: int,
+        use_index: bool,
+        strategy: str,
+        locality: bool,
+        locality_threshold: float
 ) -> None:
     if not all([lyric_folder, lab_folder, json_folder]):
         raise ValueError('Missing required folder path parameters.')
@@ -25,7 +43,12 @@ def match_lyric(
         lab_folder=lab_folder,
         json_folder=json_folder,
         language=language,
-        diff_threshold=diff_threshold
+        diff_threshold=diff_threshold,
+        workers=workers,
+        use_index=use_index,
+        strategy=strategy,
+        locality=locality,
+        locality_threshold=locality_threshold
     )
     pipeline.execute()
 
@@ -1,3 +1,9 @@
+import functools
+import marshal
+import os
+import re
+import sys
+
 tone_to_number = {
     'ā': ('a', '1'), 'á': ('a', '2'), 'ǎ': ('a', '3'), 'à': ('a', '4'),
     'ō': ('o', '1'), 'ó': ('o', '2'), 'ǒ': ('o', '3'), 'ò': ('o', '4'),
@@ -45,30 +51,29 @@ def is_special_kana(character):
     return character in special_kana
 
 
+@functools.lru_cache(maxsize=None)
+def get_token_pattern():
+    # One alternative per branch of the old character loop, in the same order. str.isdigit accepts more than
+    # the decimal digits matched by \d, so the other digit characters are listed explicitly.
+    other_digits = "".join(chr(code) for code in range(sys.maxunicode + 1)
+                           if chr(code).isdigit() and not chr(code).isdecimal())
+    return re.compile(
+        "[a-zA-Z'\\-’]+"
+        "|[\u4e00-\u9fa5\\d" + re.escape(other_digits) + "]"
+        "|[\u3040-\u30ff][ャュョゃゅょァィゥェォぁぃぅぇぉ]?"
+    )
+
+
 def split_string(input_str):
-    result = []
-    position = 0
-    while position < len(input_str):
-        current_char = input_str[position]
-        if is_letter(current_char) or is_special_letter(current_char):
-            start = position
-            while position < len(input_str) and (
-                    is_letter(input_str[position]) or is_special_letter(input_str[position])):
-                position += 1
-            result.append(input_str[start:position])
-        elif is_hanzi(current_char) or current_char.isdigit():
-            result.append(input_str[position])
-            position += 1
-        elif is_kana(current_char):
-            length = 2 if position + 1 < len(input_str) and is_special_kana(input_str[position + 1]) else 1
-            result.append(input_str[position:position + length])
-            position += length
-        else:
-            position += 1
-    return result
+    return get_token_pattern().findall(input_str)
 
 
 class ZhG2p:
+    DICT_FILES = ("phrases_map.txt", "phrases_dict.txt", "user_dict.txt", "word.txt", "trans_word.txt")
+    CACHE_FILE = "dicts.cache"
+    CACHE_VERSION = 2
+    MAX_PHRASE_LENGTH = 4
+
     def __init__(self, language):
         self.phrases_map = {}
         self.trans_dict = {}
@@ -80,11 +85,61 @@ class ZhG2p:
         else:
             dict_directory = "Dicts/cantonese"
 
+        self.phrase_trie = {}
+
+        if self.load_cache(dict_directory):
+            return
+
         self.load_dict(dict_directory, "phrases_map.txt", self.phrases_map)
         self.load_dict_list(dict_directory, "phrases_dict.txt", self.phrases_dict)
         self.load_dict_list(dict_directory, "user_dict.txt", self.phrases_dict, " ")
         self.load_dict_list(dict_directory, "word.txt", self.word_dict)
         self.load_dict(dict_directory, "trans_word.txt", self.trans_dict)
+        self.phrase_trie = self.build_trie(self.phrases_dict, self.MAX_PHRASE_LENGTH)
+        self.save_cache(dict_directory)
+
+    @classmethod
+    def from_tables(cls, phrases_map, phrases_dict, word_dict, trans_dict):
+        # Wraps tables loaded elsewhere, e.g. mappings over shared memory, without reading any file.
+        g2p = cls.__new__(cls)
+        g2p.phrases_map = phrases_map
+        g2p.phrases_dict = phrases_dict
+        g2p.word_dict = word_dict
+        g2p.trans_dict = trans_dict
+        g2p.phrase_trie = cls.build_trie(phrases_dict, cls.MAX_PHRASE_LENGTH)
+        return g2p
+
+    @classmethod
+    def source_stamp(cls, directory):
+        stamp = []
+        for file_name in cls.DICT_FILES:
+            stat = os.stat(directory + "/" + file_name)
+            stamp.append((file_name, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def load_cache(self, directory):
+        # The cache holds the parsed dictionaries and is rebuilt whenever a source file changes.
+        try:
+            with open(directory + "/" + self.CACHE_FILE, 'rb') as file:
+                version, stamp, tables = marshal.loads(file.read())
+            if version != self.CACHE_VERSION or stamp != self.source_stamp(directory):
+                return False
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+        self.phrases_map, self.phrases_dict, self.word_dict, self.trans_dict, self.phrase_trie = tables
+        return True
+
+    def save_cache(self, directory):
+        cache_path = directory + "/" + self.CACHE_FILE
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        tables = (self.phrases_map, self.phrases_dict, self.word_dict, self.trans_dict, self.phrase_trie)
+        try:
+            with open(temp_path, 'wb') as file:
+                marshal.dump((self.CACHE_VERSION, self.source_stamp(directory), tables), file)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
     @staticmethod
     def load_dict(directory, file_name, result_map):
@@ -116,13 +171,44 @@ class ZhG2p:
         final_result = input_list.copy()
         for index, position in enumerate(positions):
             final_result[position] = result[index]
-        return " ".join(final_result)
+        return final_result
 
     @staticmethod
-    def remove_elements(list_to_modify, start_index, count):
-        if 0 <= start_index < len(list_to_modify) and count > 0:
-            count_to_remove = min(count, len(list_to_modify) - start_index)
-            del list_to_modify[start_index:start_index + count_to_remove]
+    def build_trie(phrases, max_length):
+        # Nested dicts keyed by character; the "" key marks the end of a phrase.
+        trie = {}
+        for phrase in phrases:
+            if len(phrase) > max_length:
+                continue
+            node = trie
+            for character in phrase:
+                node = node.setdefault(character, {})
+            node[""] = True
+        return trie
+
+    def phrase_masks(self, text):
+        # masks[i] has bit k set when text[i:i + k] is a phrase; one short trie walk per position.
+        # A slice running past the end is cut short, so its bit follows the bit of the remaining length.
+        root = self.phrase_trie
+        max_length = self.MAX_PHRASE_LENGTH
+        text_length = len(text)
+        masks = [0] * (text_length + 1)
+        for start, character in enumerate(text):
+            node = root.get(character)
+            if node is None:
+                continue
+            mask = 2 if "" in node else 0
+            for offset in range(2, min(max_length, text_length - start) + 1):
+                node = node.get(text[start + offset - 1])
+                if node is None:
+                    break
+                if "" in node:
+                    mask |= 1 << offset
+            remaining = text_length - start
+            if remaining < max_length and mask >> remaining & 1:
+                mask |= ((1 << (max_length + 1)) - 1) ^ ((1 << remaining) - 1)
+            masks[start] = mask
+        return masks
 
     @staticmethod
     def split_string_no_regex(input_str):
@@ -159,14 +245,24 @@ class ZhG2p:
                 positions.append(index)
 
     def convert_list(self, input_list, include_tone=False, convert_number=False):
+        return " ".join(self.convert_tokens(input_list, include_tone, convert_number))
+
+    def convert_batch(self, input_lists, include_tone=False, convert_number=False):
+        # Token lists in, token lists out; the pinyin normalisation table is shared by the whole batch.
+        normalized = {}
+        return [self.convert_tokens(input_list, include_tone, convert_number, normalized) for input_list in input_lists]
+
+    def convert_tokens(self, input_list, include_tone=False, convert_number=False, normalized=None):
         processed_input = []
         input_positions = []
         self.zh_position(input_list, processed_input, input_positions, convert_number)
         clean_input = ''.join(processed_input)
+        input_length = len(processed_input)
+        masks = self.phrase_masks(clean_input)
         result = []
         cursor = 0
 
-        while cursor < len(processed_input):
+        while cursor < input_length:
             raw_current_char = processed_input[cursor]
             current_char = self.traditional_to_simplified(raw_current_char)
 
@@ -178,48 +274,56 @@ class ZhG2p:
             if not self.is_polyphonic(current_char):
                 result.append(self.get_default_pinyin(current_char))
                 cursor += 1
+            elif not any(masks[max(cursor + 1 - self.MAX_PHRASE_LENGTH, 0):cursor + 1]):
+                # No phrase starts close enough to cover this character.
+                result.append(self.get_default_pinyin(current_char))
+                cursor += 1
             else:
                 found = False
-                for length in range(4, 1, -1):
-                    if cursor + length <= len(processed_input):
-                        sub_phrase = clean_input[cursor:cursor + length]
-                        if sub_phrase in self.phrases_dict:
-                            result.extend(self.phrases_dict[sub_phrase])
+                for length in range(self.MAX_PHRASE_LENGTH, 1, -1):
+                    if cursor + length <= input_length:
+                        if masks[cursor] >> length & 1:
+                            result.extend(self.phrases_dict[clean_input[cursor:cursor + length]])
                             cursor += length
                             found = True
 
-                        if cursor >= 1 and not found:
-                            sub_phrase_1 = clean_input[cursor - 1:cursor + length - 1]
-                            if sub_phrase_1 in self.phrases_dict:
-                                result = result[:-1]
-                                result.extend(self.phrases_dict[sub_phrase_1])
-                                cursor += length - 1
-                                found = True
-
-                    if 0 <= cursor + 1 - length < cursor + 1 and not found and cursor < len(processed_input):
-                        x_sub_phrase = clean_input[cursor + 1 - length:cursor + 1]
-                        if x_sub_phrase in self.phrases_dict:
-                            self.remove_elements(result, cursor + 1 - length, length - 1)
-                            result.extend(self.phrases_dict[x_sub_phrase])
-                            cursor += 1
+                        if cursor >= 1 and not found and masks[cursor - 1] >> length & 1:
+                            if result:
+                                result.pop()
+                            result.extend(self.phrases_dict[clean_input[cursor - 1:cursor + length - 1]])
+                            cursor += length - 1
                             found = True
 
-                    if 0 <= cursor + 2 - length < cursor + 2 and not found and cursor < len(processed_input):
-                        x_sub_phrase = clean_input[cursor + 2 - length:cursor + 2]
-                        if x_sub_phrase in self.phrases_dict:
-                            self.remove_elements(result, cursor + 2 - length, length - 1)
-                            result.extend(self.phrases_dict[x_sub_phrase])
-                            cursor += 2
-                            found = True
+                    if found or cursor >= input_length:
+                        continue
+
+                    start = cursor + 1 - length
+                    if start >= 0 and masks[start] >> length & 1:
+                        del result[start:start + length - 1]
+                        result.extend(self.phrases_dict[clean_input[start:cursor + 1]])
+                        cursor += 1
+                        found = True
+                        continue
+
+                    start = cursor + 2 - length
+                    if start >= 0 and masks[start] >> length & 1:
+                        del result[start:start + length - 1]
+                        result.extend(self.phrases_dict[clean_input[start:cursor + 2]])
+                        cursor += 2
+                        found = True
 
                 if not found:
                     result.append(self.get_default_pinyin(current_char))
                     cursor += 1
 
-        if not include_tone:
-            result = [x[:-1] if x[-1].isdigit() else x for x in result]
-
-        result = [tone_to_normal(x) for x in result]
+        if normalized is None:
+            normalized = {}
+        for index, pinyin in enumerate(result):
+            plain = normalized.get(pinyin)
+            if plain is None:
+                plain = pinyin[:-1] if not include_tone and pinyin[-1].isdigit() else pinyin
+                plain = normalized[pinyin] = tone_to_normal(plain)
+            result[index] = plain
         return self.reset_zh(input_list, result, input_positions)
 
     def is_polyphonic(self, text):
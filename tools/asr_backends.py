@@ -0,0 +1,226 @@
+import os
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+
+from .audio_io import SAMPLE_RATE
+
+
+class AsrBackend(ABC):
+    name: str = ''
+
+    def __init__(self, language: str, threads: int = 0) -> None:
+        self.language = language
+        self.threads = threads
+        self.loaded: bool = False
+
+        self.load_seconds: float = 0.0
+        self.inference_seconds: float = 0.0
+        self.call_count: int = 0
+        self.clip_count: int = 0
+        self.audio_seconds: float = 0.0
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        pass
+
+    @property
+    @abstractmethod
+    def revision(self) -> str:
+        pass
+
+    @abstractmethod
+    def _load(self) -> None:
+        pass
+
+    @abstractmethod
+    def _transcribe(self, audio_list: List[np.ndarray]) -> List[Optional[str]]:
+        pass
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        start_time = time.time()
+        self._load()
+        self.load_seconds += time.time() - start_time
+        self.loaded = True
+
+    def transcribe(self, audio_list: List[np.ndarray]) -> List[Optional[str]]:
+        self.load()
+        start_time = time.time()
+        try:
+            texts = self._transcribe(audio_list)
+        finally:
+            self.inference_seconds += time.time() - start_time
+            self.call_count += 1
+        if len(texts) != len(audio_list):
+            raise RuntimeError(f"Expected {len(audio_list)} results, got {len(texts)}")
+        self.clip_count += len(audio_list)
+        self.audio_seconds += sum(len(audio) for audio in audio_list) / SAMPLE_RATE
+        return texts
+
+    def report(self) -> str:
+        rtf = self.inference_seconds / self.audio_seconds if self.audio_seconds else 0.0
+        return (f"{self.name}: load {self.load_seconds:.3f}s, inference {self.inference_seconds:.3f}s, "
+                f"calls {self.call_count}, clips {self.clip_count}, RTF {rtf:.3f}x")
+
+
+class FunAsrBackend(AsrBackend):
+    name = 'funasr'
+    MODEL_REVISION: str = "v2.0.4"
+    MODEL_MAPPING = {
+        'zh': 'iic/speech_paraformer-large_asr_nat-zh-cn-16k-common-vocab8404-pytorch',
+        'en': 'iic/speech_paraformer-large-vad-punc_asr_nat-en-16k-common-vocab10020'
+    }
+
+    def __init__(self, language: str, threads: int = 0) -> None:
+        super().__init__(language, threads)
+        self.model: Any = None
+
+    @property
+    def model_id(self) -> str:
+        return self.MODEL_MAPPING[self.language]
+
+    @property
+    def revision(self) -> str:
+        return self.MODEL_REVISION
+
+    def _load(self) -> None:
+        from funasr import AutoModel
+
+        options: Dict[str, Any] = {}
+        if self.threads > 0:
+            options['ncpu'] = self.threads  # intra-op threads of this model instance
+        self.model = AutoModel(model=self.model_id, model_revision=self.revision, **options)
+
+    def _transcribe(self, audio_list: List[np.ndarray]) -> List[Optional[str]]:
+        result = self.model.generate(
+            input=audio_list,
+            cache={},
+            is_final=True,
+            batch_size=len(audio_list)
+        )
+        if not result:
+            return [None] * len(audio_list)
+        return [item.get('text', '') if isinstance(item, dict) else str(item) for item in result]
+
+
+class OnnxParaformerBackend(AsrBackend):
+    name = 'onnx'
+
+    def __init__(self, language: str, threads: int = 0, model_dir: Optional[str] = None,
+                 quantize: bool = False, batch_size: int = 1) -> None:
+        super().__init__(language, threads)
+        if not model_dir:
+            raise ValueError("The onnx backend needs the folder of an exported Paraformer model.")
+        self.model_dir = os.path.abspath(model_dir)
+        self.quantize = quantize
+        self.batch_size = max(1, batch_size)
+        self.model: Any = None
+
+    @property
+    def model_id(self) -> str:
+        return self.model_dir
+
+    @property
+    def revision(self) -> str:
+        return 'onnx-quant' if self.quantize else 'onnx'
+
+    def _load(self) -> None:
+        try:
+            from funasr_onnx import Paraformer
+        except ImportError as error:
+            raise ImportError("The onnx backend requires funasr_onnx and onnxruntime "
+                              "(pip install funasr_onnx onnxruntime).") from error
+
+        class ArrayParaformer(Paraformer):
+            # Paraformer.load_data reads every list element as a wav path; the pipeline hands over decoded
+            # 16 kHz arrays, which still go through the model's own batching and post-processing.
+            def load_data(self, wav_content: Any, fs: Optional[int] = None) -> List[np.ndarray]:
+                if isinstance(wav_content, np.ndarray):
+                    return [wav_content]
+                return list(wav_content)
+
+        options: Dict[str, Any] = {}
+        if self.threads > 0:
+            options['intra_op_num_threads'] = self.threads
+        self.model = ArrayParaformer(self.model_dir, batch_size=self.batch_size, quantize=self.quantize, **options)
+
+    @staticmethod
+    def _extract_text(item: Any) -> str:
+        if isinstance(item, dict):
+            text = item.get('preds', item.get('text', ''))
+        else:
+            text = item
+        # Depending on the funasr_onnx version, preds is either the text or a (text, tokens) pair.
+        if isinstance(text, (list, tuple)):
+            text = text[0] if text else ''
+        return str(text)
+
+    def _transcribe(self, audio_list: List[np.ndarray]) -> List[Optional[str]]:
+        result = self.model(audio_list)
+        if not result:
+            return [None] * len(audio_list)
+        return [self._extract_text(item) for item in result]
+
+
+class StubBackend(AsrBackend):
+    # Deterministic fake recogniser: same audio, same text. Lets the pipeline be run and timed without a model.
+    name = 'stub'
+    TOKENS_PER_SECOND: float = 4.0
+    VOCABULARY = {
+        'zh': list('我你他的是在有不这人们来到时大地为子中上说生国年着就那和要她出也得里后自以会家可下而过天去能对小多'),
+        'en': ['the', 'you', 'and', 'love', 'night', 'heart', 'light', 'time', 'dream', 'sky', 'rain', 'home'],
+    }
+
+    def __init__(self, language: str, threads: int = 0, rtf: float = 0.0) -> None:
+        super().__init__(language, threads)
+        self.rtf = rtf
+
+    @property
+    def model_id(self) -> str:
+        return f'stub-{self.language}'
+
+    @property
+    def revision(self) -> str:
+        return 'stub'
+
+    def _load(self) -> None:
+        pass
+
+    def _transcribe_one(self, audio: np.ndarray) -> str:
+        samples = np.ascontiguousarray(audio, dtype=np.float32)
+        generator = random.Random(zlib.crc32(samples.tobytes()))
+        vocabulary = self.VOCABULARY.get(self.language, self.VOCABULARY['en'])
+        count = max(1, round(len(samples) / SAMPLE_RATE * self.TOKENS_PER_SECOND))
+        return ' '.join(generator.choice(vocabulary) for _ in range(count))
+
+    def _transcribe(self, audio_list: List[np.ndarray]) -> List[Optional[str]]:
+        if self.rtf > 0:
+            # Simulated compute cost; a padded batch costs as much as its longest clip times the batch size.
+            time.sleep(max(len(audio) for audio in audio_list) * len(audio_list) / SAMPLE_RATE * self.rtf)
+        return [self._transcribe_one(audio) for audio in audio_list]
+
+
+class BackendFactory:
+    _BACKEND_MAP: Dict[str, Type[AsrBackend]] = {
+        'funasr': FunAsrBackend,
+        'onnx': OnnxParaformerBackend,
+        'stub': StubBackend,
+    }
+
+    @classmethod
+    def create_backend(cls, name: str, language: str, threads: int = 0, **options: Any) -> AsrBackend:
+        key: str = name.lower()
+        if key not in cls._BACKEND_MAP:
+            raise ValueError(f"Unsupported ASR backend: {name}")
+        return cls._BACKEND_MAP[key](language, threads=threads, **options)
+
+    @classmethod
+    def get_supported_backends(cls) -> List[str]:
+        return list(cls._BACKEND_MAP.keys())
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Optional
+
+
+class AsrResultCache:
+    HASH_CHUNK_SIZE: int = 1 << 20
+
+    def __init__(self, db_path: str, max_bytes: int = 0) -> None:
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS asr_results ('
+            'key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS asr_results_access ON asr_results(last_access)')
+        self.connection.commit()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @classmethod
+    def hash_file(cls, file_path: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(cls.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, model_id: str, revision: str, language: str) -> str:
+        return f'{content_hash}|{model_id}|{revision}|{language}'
+
+    def get(self, key: str) -> Optional[str]:
+        row = self.connection.execute('SELECT text FROM asr_results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute('UPDATE asr_results SET last_access = ? WHERE key = ?', (time.time(), key))
+        self.connection.commit()
+        return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        size = len(key.encode('utf-8')) + len(text.encode('utf-8'))
+        self.connection.execute(
+            'INSERT OR REPLACE INTO asr_results (key, text, size, last_access) VALUES (?, ?, ?, ?)',
+            (key, text, size, time.time())
+        )
+        self.evict()
+        self.connection.commit()
+
+    def total_bytes(self) -> int:
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM asr_results').fetchone()[0]
+
+    def evict(self) -> None:
+        if self.max_bytes <= 0:
+            return
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+
+        # Drop least recently used entries until the cache fits again.
+        stale_keys = []
+        for key, size in self.connection.execute('SELECT key, size FROM asr_results ORDER BY last_access'):
+            stale_keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.connection.executemany('DELETE FROM asr_results WHERE key = ?', stale_keys)
+        self.evictions += len(stale_keys)
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,49 @@
+import base64
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_io import SAMPLE_RATE
+
+AsrOutcome = Tuple[Optional[str], Optional[str]]  # (text, error)
+
+
+def encode_pcm(audio: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(audio, dtype='<f4').tobytes()).decode('ascii')
+
+
+def decode_pcm(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype='<f4')
+
+
+class AsrClient:
+    def __init__(self, url: str, timeout: float = 600.0) -> None:
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def health(self) -> Optional[Dict[str, Any]]:
+        try:
+            with urllib.request.urlopen(f'{self.url}/health', timeout=2.0) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+
+    def _post_items(self, items: List[Dict[str, Any]]) -> List[AsrOutcome]:
+        request = urllib.request.Request(
+            f'{self.url}/transcribe',
+            data=json.dumps({'items': items}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            results = json.loads(response.read().decode('utf-8'))['results']
+        return [(result.get('text'), result.get('error')) for result in results]
+
+    def transcribe_paths(self, wav_paths: List[str]) -> List[AsrOutcome]:
+        return self._post_items([{'path': path} for path in wav_paths])
+
+    def transcribe_pcm(self, audio_list: List[np.ndarray]) -> List[AsrOutcome]:
+        return self._post_items([{'pcm': encode_pcm(audio), 'sample_rate': SAMPLE_RATE} for audio in audio_list])
@@ -0,0 +1,64 @@
+import os
+from typing import Any, Dict, Optional
+
+from .asr_pipeline import AsrItem, AsrPipeline
+from .language_processors import LyricData
+from .lyric_matcher import LyricMatchingPipeline
+from .sequence_aligner import MatchStrategy
+
+
+class AsrMatchPipeline(AsrPipeline):
+    # Feeds every ASR transcript straight into the lyric matcher, so no lab file has to be written and read back.
+    def __init__(
+            self,
+            wav_folder: str,
+            lyric_folder: str,
+            json_folder: str,
+            language: str,
+            lab_folder: Optional[str] = None,
+            diff_threshold: int = 5,
+            use_index: bool = True,
+            strategy: str = MatchStrategy.WINDOW,
+            **asr_options: Any
+    ) -> None:
+        super().__init__(wav_folder=wav_folder, lab_folder=lab_folder, language=language, **asr_options)
+        self.matching = LyricMatchingPipeline(
+            lyric_folder=lyric_folder,
+            lab_folder=lab_folder or '',
+            json_folder=json_folder,
+            language=language,
+            diff_threshold=diff_threshold,
+            use_index=use_index,
+            strategy=strategy
+        )
+        self.lyric_dict: Dict[str, LyricData] = {}
+
+    def find_existing_output(self, item: AsrItem) -> Optional[str]:
+        json_path = self.matching.get_json_path(self._extract_wav_name(item))
+        return json_path if os.path.exists(json_path) else None
+
+    @staticmethod
+    def _extract_wav_name(item: AsrItem) -> str:
+        return os.path.splitext(os.path.basename(item.wav_path))[0]
+
+    def emit_result(self, item: AsrItem, text: str) -> None:
+        super().emit_result(item, text)
+
+        lab_name = self._extract_wav_name(item)
+        lyric_name = lab_name.rsplit("_", 1)[0]
+        self.matching.total_files += 1
+        if lyric_name not in self.lyric_dict:
+            self.matching.add_missing_lyric(lyric_name)
+            print(f"Wav file: {item.wav_path}\nMissing lyric file: {lyric_name}")
+            return
+
+        result = self.matching.process_lab_content(lab_name, text.strip(), self.lyric_dict[lyric_name])
+        if result:
+            self.matching.compare_and_save_result(result)
+
+    def execute(self) -> None:
+        os.makedirs(self.matching.json_folder, exist_ok=True)
+        self.lyric_dict = self.matching.load_all_lyrics()
+        super().execute()
+        print("---------------")
+        self.matching.print_summary()
@@ -0,0 +1,57 @@
+from typing import Any, Callable, Dict
+
+import click
+
+from .asr_backends import BackendFactory
+
+# Command-line options shared by fun_asr.py and asr_match.py.
+ASR_OPTIONS = [
+    click.option('--batch_size', default=1, type=int, show_default=True,
+                 help='Maximum number of clips per inference call.'),
+    click.option('--max_batch_seconds', default=300.0, type=float, show_default=True,
+                 help='Maximum padded audio seconds per batch (0 = unlimited).'),
+    click.option('--loader_workers', default=2, type=int, show_default=True,
+                 help='Number of workers decoding audio ahead of inference (0 = decode inline).'),
+    click.option('--prefetch', default=16, type=int, show_default=True,
+                 help='Maximum number of decoded clips waiting for inference.'),
+    click.option('--loader_type', default='thread', type=click.Choice(['thread', 'process']), show_default=True,
+                 help='Run the audio loaders as threads or processes.'),
+    click.option('--workers', default=1, type=int, show_default=True,
+                 help='Number of ASR processes, each with its own model instance.'),
+    click.option('--threads', default=0, type=int, show_default=True,
+                 help='Intra-op threads per model instance (0 = library default).'),
+    click.option('--cache_path', default=None, type=str,
+                 help='SQLite file caching ASR results by audio content (disabled if not set).'),
+    click.option('--cache_max_mb', default=256.0, type=float, show_default=True,
+                 help='Cache size limit in MB; least recently used results are evicted first (0 = unlimited).'),
+    click.option('--server', 'server_url', default=None, type=str,
+                 help='URL of a running asr_server.py, e.g. http://127.0.0.1:8765 (model is loaded locally if down).'),
+    click.option('--backend', default='funasr', type=click.Choice(BackendFactory.get_supported_backends()),
+                 show_default=True, help='ASR backend: funasr, onnx (exported Paraformer) or stub (offline testing).'),
+    click.option('--onnx_model_dir', default=None, type=str, help='Exported Paraformer model folder (onnx backend).'),
+    click.option('--onnx_quantize', is_flag=True, help='Use the quantized ONNX model (onnx backend).'),
+    click.option('--stub_rtf', default=0.0, type=float, show_default=True,
+                 help='Simulated real-time factor of the stub backend.'),
+]
+
+
+def asr_options(func: Callable) -> Callable:
+    for option in reversed(ASR_OPTIONS):
+        func = option(func)
+    return func
+
+
+def build_pipeline_options(
+        onnx_model_dir: str = None,
+        onnx_quantize: bool = False,
+        stub_rtf: float = 0.0,
+        **options: Any
+) -> Dict[str, Any]:
+    backend = options.get('backend', 'funasr')
+    backend_options = {}
+    if backend == 'onnx':
+        backend_options = {'model_dir': onnx_model_dir, 'quantize': onnx_quantize,
+                           'batch_size': options.get('batch_size', 1)}
+    elif backend == 'stub':
+        backend_options = {'rtf': stub_rtf}
+    return dict(options, backend_options=backend_options)
@@ -0,0 +1,445 @@
+import glob
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .asr_backends import AsrBackend, BackendFactory
+from .asr_cache import AsrResultCache
+from .asr_client import AsrClient
+from .audio_io import AudioPrefetcher, SAMPLE_RATE, get_duration
+
+
+@dataclass
+class AsrItem:
+    wav_path: str
+    lab_path: Optional[str]
+    duration: float
+    cache_key: Optional[str] = None
+
+
+class AsrPipeline:
+    WAV_EXTENSION: str = ".wav"
+    LAB_EXTENSION: str = ".lab"
+    SAMPLE_RATE: int = SAMPLE_RATE
+
+    def __init__(
+            self,
+            wav_folder: str,
+            lab_folder: Optional[str],
+            language: str,
+            batch_size: int = 1,
+            max_batch_seconds: float = 0.0,
+            loader_workers: int = 2,
+            prefetch: int = 16,
+            loader_type: str = 'thread',
+            workers: int = 1,
+            threads: int = 0,
+            cache_path: Optional[str] = None,
+            cache_max_mb: float = 256.0,
+            server_url: Optional[str] = None,
+            backend: str = 'funasr',
+            backend_options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.wav_folder = wav_folder
+        self.lab_folder = lab_folder
+        self.language = language
+        self.batch_size = max(1, batch_size)
+        self.max_batch_seconds = max_batch_seconds
+        self.prefetcher = AudioPrefetcher(
+            num_workers=loader_workers,
+            queue_depth=max(prefetch, self.batch_size),
+            executor_type=loader_type,
+            sample_rate=self.SAMPLE_RATE
+        )
+        self.workers = max(1, workers)
+        self.threads = threads
+        # Not loaded yet: the main process only needs its identity when the model runs in workers or a server.
+        self.backend: AsrBackend = BackendFactory.create_backend(
+            backend, language, threads=threads, **(backend_options or {})
+        )
+        self._worker_options: Dict[str, Any] = dict(
+            wav_folder=wav_folder, lab_folder=lab_folder, language=language,
+            batch_size=batch_size, max_batch_seconds=max_batch_seconds,
+            loader_workers=loader_workers, prefetch=prefetch, loader_type=loader_type,
+            threads=threads, backend=backend, backend_options=backend_options
+        )
+        self.cache: Optional[AsrResultCache] = None
+        if cache_path:
+            self.cache = AsrResultCache(cache_path, max_bytes=int(cache_max_mb * 1024 * 1024))
+        self.client: Optional[AsrClient] = AsrClient(server_url) if server_url else None
+
+        self.total_files: int = 0
+        self.success_count: int = 0
+        self.skip_count: int = 0
+        self.error_count: int = 0
+        self.wav_seconds: float = 0.0
+        self.batch_count: int = 0
+        self.inference_seconds: float = 0.0
+        self.worker_stats: Dict[int, Tuple[int, float, str]] = {}
+
+    def collect_items(self) -> List[AsrItem]:
+        items: List[AsrItem] = []
+        wav_list = glob.glob(os.path.join(self.wav_folder, f'*{self.WAV_EXTENSION}'))
+        self.total_files = len(wav_list)
+        for wav_path in wav_list:
+            wav_name = os.path.splitext(os.path.basename(wav_path))[0]
+            lab_path = os.path.join(self.lab_folder, f'{wav_name}{self.LAB_EXTENSION}') if self.lab_folder else None
+            item = AsrItem(wav_path, lab_path, 0.0)
+            existing_output = self.find_existing_output(item)
+            if existing_output is not None:
+                print(f"{existing_output} exists, skip\n")
+                self.skip_count += 1
+                continue
+
+            try:
+                if self.cache is not None and self._load_cached(item):
+                    continue
+                item.duration = get_duration(wav_path)
+            except Exception as e:
+                self.report_error(item, e)
+                continue
+            self.wav_seconds += item.duration
+            items.append(item)
+        return items
+
+    def find_existing_output(self, item: AsrItem) -> Optional[str]:
+        if item.lab_path is not None and os.path.exists(item.lab_path):
+            return item.lab_path
+        return None
+
+    def make_cache_key(self, content_hash: str) -> str:
+        return AsrResultCache.make_key(content_hash, self.backend.model_id, self.backend.revision, self.language)
+
+    def _load_cached(self, item: AsrItem) -> bool:
+        # Keyed by audio content rather than file name, so renamed or moved clips are still found.
+        item.cache_key = self.make_cache_key(AsrResultCache.hash_file(item.wav_path))
+        return self._emit_cached(item)
+
+    def _emit_cached(self, item: AsrItem) -> bool:
+        text = self.cache.get(item.cache_key)
+        if text is None:
+            return False
+
+        print(f"{item.wav_path} (cached)\n{text}\n")
+        self.emit_result(item, text)
+        self.success_count += 1
+        return True
+
+    @staticmethod
+    def make_batches(items: List[AsrItem], batch_size: int, max_batch_seconds: float) -> List[List[AsrItem]]:
+        # Sorting by duration keeps clips of similar length together, so little padding is wasted per batch.
+        batches: List[List[AsrItem]] = []
+        current: List[AsrItem] = []
+        for item in sorted(items, key=lambda x: x.duration):
+            padded_seconds = item.duration * (len(current) + 1)
+            if current and (len(current) >= batch_size or
+                            (max_batch_seconds > 0 and padded_seconds > max_batch_seconds)):
+                batches.append(current)
+                current = []
+            current.append(item)
+        if current:
+            batches.append(current)
+        return batches
+
+    def transcribe(self, audio_list: List[Any]) -> List[Optional[str]]:
+        start_time = time.time()
+        try:
+            return self.backend.transcribe(audio_list)
+        finally:
+            self.inference_seconds += time.time() - start_time
+
+    def save_result(self, item: AsrItem, text: Optional[str]) -> None:
+        if text is None:
+            print(f"{item.wav_path}: No result\n")
+            return
+
+        print(f"{item.wav_path}\n{text}\n")
+        self.emit_result(item, text)
+        self.success_count += 1
+        if self.cache is not None and item.cache_key is not None:
+            self.cache.put(item.cache_key, text)
+
+    def emit_result(self, item: AsrItem, text: str) -> None:
+        if item.lab_path is None:
+            return
+        with open(item.lab_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def report_error(self, item: AsrItem, error: Exception) -> None:
+        print(f"{item.wav_path}: Error - {str(error)}\n")
+        self.error_count += 1
+
+    def iter_loaded_batches(
+            self,
+            batches: Iterable[List[AsrItem]]
+    ) -> Iterator[List[Tuple[AsrItem, Any, Optional[Exception]]]]:
+        # The prefetcher runs ahead of the consumer across batch boundaries, so remember where each batch ends.
+        batch_sizes: Deque[int] = deque()
+
+        def flatten() -> Iterator[AsrItem]:
+            for batch in batches:
+                batch_sizes.append(len(batch))
+                yield from batch
+
+        loaded = self.prefetcher.iterate(flatten(), lambda item: item.wav_path)
+        while True:
+            first = next(loaded, None)
+            if first is None:
+                return
+            size = batch_sizes.popleft()
+            yield [first] + [next(loaded) for _ in range(size - 1)]
+
+    def process_batch(self, loaded_batch: List[Tuple[AsrItem, Any, Optional[Exception]]]) -> None:
+        loaded_items: List[AsrItem] = []
+        audio_list: List[Any] = []
+        for item, y, error in loaded_batch:
+            if error is not None:
+                self.report_error(item, error)
+                continue
+            loaded_items.append(item)
+            audio_list.append(y)
+
+        if not loaded_items:
+            return
+
+        self.batch_count += 1
+        try:
+            texts = self.transcribe(audio_list)
+        except Exception as e:
+            if len(loaded_items) == 1:
+                self.report_error(loaded_items[0], e)
+                return
+            # Retry one by one so a single bad clip does not take the whole batch down with it.
+            for item, y in zip(loaded_items, audio_list):
+                try:
+                    self.save_result(item, self.transcribe([y])[0])
+                except Exception as single_error:
+                    self.report_error(item, single_error)
+            return
+
+        for item, text in zip(loaded_items, texts):
+            try:
+                self.save_result(item, text)
+            except Exception as e:
+                self.report_error(item, e)
+
+    def process_remote_batch(self, client: AsrClient, batch: List[AsrItem]) -> None:
+        self.process_remote_items(batch, lambda: client.transcribe_paths(
+            [os.path.abspath(item.wav_path) for item in batch]))
+
+    def process_remote_items(self, items: List[AsrItem],
+                             transcribe: Callable[[], List[Tuple[Optional[str], Optional[str]]]]) -> None:
+        self.batch_count += 1
+        start_time = time.time()
+        try:
+            outcomes = transcribe()
+        except Exception as e:
+            for item in items:
+                self.report_error(item, e)
+            return
+        finally:
+            self.inference_seconds += time.time() - start_time
+
+        for item, (text, error) in zip(items, outcomes):
+            if error is not None:
+                self.report_error(item, RuntimeError(error))
+                continue
+            try:
+                self.save_result(item, text)
+            except Exception as e:
+                self.report_error(item, e)
+
+    def _connect_server(self) -> Optional[AsrClient]:
+        if self.client is None:
+            return None
+        info = self.client.health()
+        if info is None:
+            print(f"ASR server {self.client.url} is not running, loading the model locally.")
+            return None
+        # Server results are cached under the local backend's identity, so the server must run the same model.
+        expected = {'language': self.language, 'backend': self.backend.name,
+                    'model': self.backend.model_id, 'revision': self.backend.revision}
+        for field, value in expected.items():
+            if info.get(field) != value:
+                print(f"ASR server {self.client.url} serves {field} {info.get(field)} instead of {value}, "
+                      f"loading the model locally.")
+                return None
+        print(f"Using ASR server {self.client.url}")
+        return self.client
+
+    def print_summary(self, elapsed_seconds: float) -> None:
+        print("---------------")
+        print("Done!")
+        if self.wav_seconds != 0:
+            print(f"RTF: {elapsed_seconds / self.wav_seconds:.3f}x")
+        print(f"Wav time: {self.wav_seconds:.3f}s")
+        print(f"Processing time: {elapsed_seconds:.3f}s")
+        print(f"Inference time: {self.inference_seconds:.3f}s")
+        if self.worker_stats:
+            if elapsed_seconds > 0:
+                print(f"Throughput: {self.wav_seconds / elapsed_seconds:.3f} wav seconds per second")
+            for worker_id, (batch_count, inference_seconds, report) in sorted(self.worker_stats.items()):
+                print(f"Worker {worker_id}: batches: {batch_count}, inference time: {inference_seconds:.3f}s, "
+                      f"{report}")
+        elif self.backend.loaded:
+            print(f"Backend {self.backend.report()}")
+        if self.cache is not None:
+            print(f"Cache hits: {self.cache.hits}, misses: {self.cache.misses}, evictions: {self.cache.evictions}, "
+                  f"size: {self.cache.total_bytes() / 1024 / 1024:.2f}MB")
+        print(f"Total files: {self.total_files}, transcribed: {self.success_count}, "
+              f"skipped: {self.skip_count}, errors: {self.error_count}, batches: {self.batch_count}")
+
+    def _start_workers(self, task_queue: Any, result_queue: Any) -> Tuple[List[Any], int]:
+        # Not daemonic, so a worker can run its own process pool of audio loaders; every exit path below joins or
+        # terminates the workers instead.
+        context = multiprocessing.get_context('spawn')
+        processes = []
+        for worker_id in range(self.workers):
+            process = context.Process(
+                target=_asr_worker_main,
+                args=(worker_id, self._worker_options, task_queue, result_queue)
+            )
+            process.start()
+            processes.append(process)
+
+        # Loading a model can take minutes, so there is no deadline; only a worker that died without reporting
+        # back stops the wait. Liveness is sampled before waiting, since a dead worker's last message is already
+        # in the queue by then.
+        ready = 0
+        reported = 0
+        while reported < self.workers:
+            lost = sum(1 for process in processes if process.is_alive()) < self.workers - reported
+            try:
+                kind, worker_id, payload = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if lost:
+                    exit_codes = [process.exitcode for process in processes if not process.is_alive()]
+                    for process in processes:
+                        process.terminate()
+                    raise RuntimeError(f"An ASR worker exited while loading the ASR backend "
+                                       f"(exit codes: {exit_codes}).")
+                continue
+            reported += 1
+            if kind == 'fatal':
+                print(f"Worker {worker_id} failed to load ASR backend: {payload}")
+            else:
+                ready += 1
+        if ready == 0:
+            for process in processes:
+                process.join()
+            raise RuntimeError("No ASR worker could load the ASR backend.")
+        return processes, ready
+
+    def _run_workers(self, batches: List[List[AsrItem]], task_queue: Any, result_queue: Any,
+                     processes: List[Any], running: int) -> None:
+        pending: Dict[str, AsrItem] = {}
+        # Longest batches first, so a long tail of big clips does not leave the other workers idle at the end.
+        for batch in reversed(batches):
+            for item in batch:
+                pending[item.wav_path] = item
+            task_queue.put(batch)
+        for _ in processes:
+            task_queue.put(None)
+
+        try:
+            while running > 0:
+                try:
+                    kind, worker_id, payload = result_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    continue
+
+                if kind == 'result':
+                    item, text = payload
+                    pending.pop(item.wav_path, None)
+                    self.save_result(item, text)
+                elif kind == 'error':
+                    item, message = payload
+                    pending.pop(item.wav_path, None)
+                    self.report_error(item, RuntimeError(message))
+                elif kind == 'stats':
+                    self.worker_stats[worker_id] = payload
+                    self.batch_count += payload[0]
+                    self.inference_seconds += payload[1]
+                    running -= 1
+        except BaseException:
+            # Workers are not daemonic, so they would otherwise keep the interpreter alive.
+            for process in processes:
+                process.terminate()
+            raise
+
+        for item in pending.values():
+            self.report_error(item, RuntimeError("ASR worker exited before finishing this file"))
+        for process in processes:
+            process.join()
+
+    def execute(self) -> None:
+        if self.lab_folder:
+            os.makedirs(self.lab_folder, exist_ok=True)
+        print(f"Started! Language: {self.language}")
+        print("---------------")
+        start_time = time.time()
+
+        # Existing labs and cache hits are resolved first, so a fully cached run loads no model and starts no workers.
+        items = self.collect_items()
+        batches = self.make_batches(items, self.batch_size, self.max_batch_seconds)
+        setup_seconds = 0.0
+        if batches:
+            setup_start = time.time()
+            # A running ASR server already has the model loaded, so nothing is loaded locally in that case.
+            client = self._connect_server()
+            if client is None and self.workers > 1:
+                context = multiprocessing.get_context('spawn')
+                task_queue, result_queue = context.Queue(), context.Queue()
+                processes, ready = self._start_workers(task_queue, result_queue)
+            elif client is None:
+                self.backend.load()
+            setup_seconds = time.time() - setup_start
+
+            if client is not None:
+                for batch in batches:
+                    self.process_remote_batch(client, batch)
+            elif self.workers > 1:
+                self._run_workers(batches, task_queue, result_queue, processes, ready)
+            else:
+                for loaded_batch in self.iter_loaded_batches(batches):
+                    self.process_batch(loaded_batch)
+
+        # Model loading and worker start-up are left out, as before, so the RTF only covers the work per file.
+        self.print_summary(time.time() - start_time - setup_seconds)
+        if self.cache is not None:
+            self.cache.close()
+
+
+class _AsrWorker(AsrPipeline):
+    # Runs inside a worker process and hands every outcome back to the parent, which owns all output.
+    def __init__(self, worker_id: int, result_queue: Any, **options: Any) -> None:
+        super().__init__(**options)
+        self.worker_id = worker_id
+        self.result_queue = result_queue
+
+    def save_result(self, item: AsrItem, text: Optional[str]) -> None:
+        self.result_queue.put(('result', self.worker_id, (item, text)))
+
+    def report_error(self, item: AsrItem, error: Exception) -> None:
+        self.result_queue.put(('error', self.worker_id, (item, str(error))))
+
+
+def _asr_worker_main(worker_id: int, options: Dict[str, Any], task_queue: Any, result_queue: Any) -> None:
+    worker = _AsrWorker(worker_id, result_queue, **options)
+    try:
+        worker.backend.load()
+    except Exception as e:
+        result_queue.put(('fatal', worker_id, str(e)))
+        return
+    result_queue.put(('ready', worker_id, None))
+
+    # Only the current batch and the next one are loaded, so the other workers can still take the rest.
+    for loaded_batch in worker.prefetcher.iterate_groups(iter(task_queue.get, None), lambda item: item.wav_path):
+        worker.process_batch(loaded_batch)
+    result_queue.put(('stats', worker_id, (worker.batch_count, worker.inference_seconds, worker.backend.report())))
@@ -0,0 +1,123 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .asr_backends import AsrBackend
+from .asr_client import AsrOutcome, decode_pcm
+from .audio_io import SAMPLE_RATE, load_audio
+
+
+class AsrService:
+    # Keeps one backend loaded and serves batches of wav paths or 16 kHz float32 PCM buffers.
+    def __init__(self, backend: AsrBackend) -> None:
+        self.backend = backend
+        self.backend.load()
+        self.lock = threading.Lock()
+        self.request_count: int = 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'language': self.backend.language,
+            'backend': self.backend.name,
+            'model': self.backend.model_id,
+            'revision': self.backend.revision,
+            'sample_rate': SAMPLE_RATE,
+            'requests': self.request_count,
+            'report': self.backend.report(),
+        }
+
+    @staticmethod
+    def _decode_item(item: Dict[str, Any]) -> np.ndarray:
+        if 'path' in item:
+            return load_audio(item['path'])
+        if 'pcm' in item:
+            if item.get('sample_rate', SAMPLE_RATE) != SAMPLE_RATE:
+                raise ValueError(f"PCM input must be {SAMPLE_RATE} Hz")
+            return decode_pcm(item['pcm'])
+        raise ValueError("Item needs either 'path' or 'pcm'")
+
+    def transcribe_items(self, items: List[Dict[str, Any]]) -> List[AsrOutcome]:
+        outcomes: List[AsrOutcome] = [(None, None)] * len(items)
+        indices: List[int] = []
+        audio_list: List[np.ndarray] = []
+        for index, item in enumerate(items):
+            try:
+                audio_list.append(self._decode_item(item))
+                indices.append(index)
+            except Exception as e:
+                outcomes[index] = (None, str(e))
+
+        if not audio_list:
+            return outcomes
+
+        with self.lock:
+            self.request_count += 1
+            try:
+                texts = self.backend.transcribe(audio_list)
+                for index, text in zip(indices, texts):
+                    outcomes[index] = (text, None)
+            except Exception:
+                # Same policy as the local pipeline: retry one by one so errors stay per item.
+                for index, audio in zip(indices, audio_list):
+                    try:
+                        outcomes[index] = (self.backend.transcribe([audio])[0], None)
+                    except Exception as e:
+                        outcomes[index] = (None, str(e))
+        return outcomes
+
+
+class _AsrRequestHandler(BaseHTTPRequestHandler):
+    server: 'AsrServer'
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self._send_json(200, self.server.service.describe())
+        else:
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+
+    def do_POST(self) -> None:
+        if self.path != '/transcribe':
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            items = request['items']
+        except Exception as e:
+            self._send_json(400, {'error': f'Bad request: {str(e)}'})
+            return
+
+        outcomes = self.server.service.transcribe_items(items)
+        self._send_json(200, {'results': [{'text': text, 'error': error} for text, error in outcomes]})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class AsrServer(ThreadingHTTPServer):
+    DEFAULT_HOST: str = '127.0.0.1'
+    DEFAULT_PORT: int = 8765
+    daemon_threads = True
+
+    def __init__(self, service: AsrService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 verbose: bool = False) -> None:
+        super().__init__((host, port), _AsrRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
@@ -0,0 +1,122 @@
+import glob
+import os
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile
+
+from .asr_cache import AsrResultCache
+from .asr_client import AsrClient
+from .asr_pipeline import AsrItem, AsrPipeline
+from .audio_segmenter import EnergySegmenter, iter_audio_blocks
+
+
+class AsrStreamPipeline(AsrPipeline):
+    # For long unsliced recordings: reads blocks, cuts segments at pauses and writes name_###.lab per segment.
+    def __init__(
+            self,
+            wav_folder: str,
+            lab_folder: str,
+            language: str,
+            segment_folder: Optional[str] = None,
+            block_seconds: float = 30.0,
+            threshold_db: float = -40.0,
+            min_silence_seconds: float = 0.3,
+            min_segment_seconds: float = 2.0,
+            max_segment_seconds: float = 15.0,
+            **asr_options: Any
+    ) -> None:
+        super().__init__(wav_folder=wav_folder, lab_folder=lab_folder, language=language, **asr_options)
+        self.segment_folder = segment_folder
+        self.block_seconds = block_seconds
+        self.segmenter = EnergySegmenter(
+            sample_rate=self.SAMPLE_RATE,
+            threshold_db=threshold_db,
+            min_silence_seconds=min_silence_seconds,
+            min_segment_seconds=min_segment_seconds,
+            max_segment_seconds=max_segment_seconds
+        )
+        self.segment_count: int = 0
+
+    def iter_segment_items(self, wav_path: str) -> Iterator[Tuple[AsrItem, np.ndarray]]:
+        wav_name = os.path.splitext(os.path.basename(wav_path))[0]
+        # A segment is identified by the recording's content and its bounds, which also change with the
+        # segmenter settings.
+        content_hash = AsrResultCache.hash_file(wav_path) if self.cache is not None else None
+        blocks = iter_audio_blocks(wav_path, self.block_seconds, self.SAMPLE_RATE)
+        for index, segment in enumerate(self.segmenter.segment(blocks)):
+            segment_name = f'{wav_name}_{index:03d}'
+            lab_path = os.path.join(self.lab_folder, f'{segment_name}{self.LAB_EXTENSION}')
+            duration = len(segment.audio) / self.SAMPLE_RATE
+            self.segment_count += 1
+
+            if self.segment_folder:
+                source = os.path.join(self.segment_folder, f'{segment_name}{self.WAV_EXTENSION}')
+                soundfile.write(source, segment.audio, self.SAMPLE_RATE)
+            else:
+                source = f'{wav_path}[{segment.start / self.SAMPLE_RATE:.2f}s-{segment.end / self.SAMPLE_RATE:.2f}s]'
+
+            item = AsrItem(source, lab_path, duration)
+            existing_output = self.find_existing_output(item)
+            if existing_output is not None:
+                print(f"{existing_output} exists, skip\n")
+                self.skip_count += 1
+                continue
+            if content_hash is not None:
+                item.cache_key = self.make_cache_key(f'{content_hash}@{segment.start}-{segment.end}')
+                if self._emit_cached(item):
+                    continue
+            self.wav_seconds += duration
+            yield item, segment.audio
+
+    def iter_segment_batches(self, wav_path: str) -> Iterator[List[Tuple[AsrItem, Any, Optional[Exception]]]]:
+        # Segments arrive in order, so batches are cut by count and padded seconds as they come.
+        batch: List[Tuple[AsrItem, Any, Optional[Exception]]] = []
+        longest = 0.0
+        for item, audio in self.iter_segment_items(wav_path):
+            longest = max(longest, item.duration)
+            if batch and (len(batch) >= self.batch_size or
+                          (self.max_batch_seconds > 0 and longest * (len(batch) + 1) > self.max_batch_seconds)):
+                yield batch
+                batch = []
+                longest = item.duration
+            batch.append((item, audio, None))
+        if batch:
+            yield batch
+
+    def process_remote_pcm_batch(self, client: AsrClient,
+                                 loaded_batch: List[Tuple[AsrItem, Any, Optional[Exception]]]) -> None:
+        self.process_remote_items([item for item, _, _ in loaded_batch],
+                                  lambda: client.transcribe_pcm([audio for _, audio, _ in loaded_batch]))
+
+    def execute(self) -> None:
+        os.makedirs(self.lab_folder, exist_ok=True)
+        if self.segment_folder:
+            os.makedirs(self.segment_folder, exist_ok=True)
+        if self.workers > 1:
+            print("Streaming mode runs in a single process, --workers is ignored.")
+        client = self._connect_server()
+        if client is None:
+            self.backend.load()
+
+        print(f"Started! Language: {self.language}")
+        print("---------------")
+        start_time = time.time()
+
+        wav_list = glob.glob(os.path.join(self.wav_folder, f'*{self.WAV_EXTENSION}'))
+        self.total_files = len(wav_list)
+        for wav_path in wav_list:
+            try:
+                for loaded_batch in self.iter_segment_batches(wav_path):
+                    if client is not None:
+                        self.process_remote_pcm_batch(client, loaded_batch)
+                    else:
+                        self.process_batch(loaded_batch)
+            except Exception as e:
+                self.report_error(AsrItem(wav_path, None, 0.0), e)
+
+        self.print_summary(time.time() - start_time)
+        print(f"Segments: {self.segment_count}")
+        if self.cache is not None:
+            self.cache.close()
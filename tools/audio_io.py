@@ -0,0 +1,126 @@
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import librosa
+import numpy as np
+import soundfile
+
+T = TypeVar('T')
+
+SAMPLE_RATE: int = 16000
+
+
+def get_duration(wav_path: str) -> float:
+    # Only the header is parsed; librosa is the fallback for containers soundfile cannot open.
+    try:
+        return soundfile.info(wav_path).duration
+    except RuntimeError:
+        return librosa.get_duration(filename=wav_path)
+
+
+def load_audio(wav_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    try:
+        data, native_rate = soundfile.read(wav_path, dtype='float32', always_2d=True)
+    except RuntimeError:
+        y, _ = librosa.load(wav_path, sr=sample_rate, mono=True)
+        return y
+
+    y = data[:, 0] if data.shape[1] == 1 else data.mean(axis=1)
+    if native_rate != sample_rate:
+        y = librosa.resample(y, orig_sr=native_rate, target_sr=sample_rate)
+    return y
+
+
+# Decodes audio ahead of the consumer on a small pool, keeping at most `queue_depth` clips in flight.
+class AudioPrefetcher:
+    EXECUTOR_TYPES = ('thread', 'process')
+
+    def __init__(
+            self,
+            num_workers: int = 2,
+            queue_depth: int = 16,
+            executor_type: str = 'thread',
+            sample_rate: int = SAMPLE_RATE
+    ) -> None:
+        if executor_type not in self.EXECUTOR_TYPES:
+            raise ValueError(f"Unsupported executor type: {executor_type}")
+        self.num_workers = max(0, num_workers)
+        self.queue_depth = max(1, queue_depth)
+        self.executor_type = executor_type
+        self.load_fn: Callable[[str], np.ndarray] = partial(load_audio, sample_rate=sample_rate)
+
+    def _create_executor(self) -> Executor:
+        if self.executor_type == 'process':
+            return ProcessPoolExecutor(max_workers=self.num_workers)
+        return ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix='audio-loader')
+
+    def _load(self, path: str) -> Tuple[Optional[np.ndarray], Optional[Exception]]:
+        try:
+            return self.load_fn(path), None
+        except Exception as e:
+            return None, e
+
+    def iterate(
+            self,
+            items: Iterable[T],
+            path_getter: Callable[[T], str] = lambda item: item
+    ) -> Iterator[Tuple[T, Optional[np.ndarray], Optional[Exception]]]:
+        if self.num_workers == 0:
+            for item in items:
+                yield (item, *self._load(path_getter(item)))
+            return
+
+        item_iter = iter(items)
+        with self._create_executor() as executor:
+            pending: Deque = deque()
+
+            def submit_next() -> None:
+                for item in item_iter:
+                    pending.append((item, executor.submit(self.load_fn, path_getter(item))))
+                    return
+
+            for _ in range(self.queue_depth):
+                submit_next()
+
+            while pending:
+                item, future = pending.popleft()
+                submit_next()
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+    def iterate_groups(
+            self,
+            groups: Iterable[List[T]],
+            path_getter: Callable[[T], str] = lambda item: item
+    ) -> Iterator[List[Tuple[T, Optional[np.ndarray], Optional[Exception]]]]:
+        # Loads a whole group (batch) at a time plus the next one, and takes a group from `groups` only when it is
+        # about to be loaded: queue_depth does not apply, so a shared task queue is not drained ahead of time.
+        if self.num_workers == 0:
+            for group in groups:
+                yield [(item, *self._load(path_getter(item))) for item in group]
+            return
+
+        group_iter = iter(groups)
+        with self._create_executor() as executor:
+            pending: Deque = deque()
+
+            def submit_next() -> None:
+                for group in group_iter:
+                    pending.append([(item, executor.submit(self.load_fn, path_getter(item))) for item in group])
+                    return
+
+            submit_next()
+            while pending:
+                group = pending.popleft()
+                submit_next()
+                loaded = []
+                for item, future in group:
+                    try:
+                        loaded.append((item, future.result(), None))
+                    except Exception as e:
+                        loaded.append((item, None, e))
+                yield loaded
@@ -0,0 +1,150 @@
+import math
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+import librosa
+import numpy as np
+import soundfile
+
+from .audio_io import SAMPLE_RATE
+
+
+@dataclass
+class AudioSegment:
+    start: int  # offset in samples at the target sample rate
+    audio: np.ndarray
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.audio)
+
+
+def iter_audio_blocks(
+        wav_path: str,
+        block_seconds: float = 30.0,
+        sample_rate: int = SAMPLE_RATE
+) -> Iterator[np.ndarray]:
+    # Reads fixed-size blocks, so memory does not grow with the length of the recording.
+    info = soundfile.info(wav_path)
+    block_size = max(1, int(block_seconds * info.samplerate))
+    blocks = (block[:, 0] if block.shape[1] == 1 else block.mean(axis=1)
+              for block in soundfile.blocks(wav_path, blocksize=block_size, dtype='float32', always_2d=True))
+    if info.samplerate == sample_rate:
+        yield from blocks
+    else:
+        yield from resample_blocks(blocks, info.samplerate, sample_rate)
+
+
+def resample_blocks(
+        blocks: Iterable[np.ndarray],
+        orig_sr: int,
+        target_sr: int,
+        context_seconds: float = 0.1
+) -> Iterator[np.ndarray]:
+    # Resampling each block on its own rings at the block edges. Every block is resampled with context_seconds of
+    # the neighbouring audio on both sides and only the middle is kept; the kept ranges start on multiples of
+    # orig_sr / gcd input samples, where input and output samples line up exactly, so nothing drifts.
+    divisor = math.gcd(orig_sr, target_sr)
+    step, out_step = orig_sr // divisor, target_sr // divisor
+    margin = math.ceil(context_seconds * orig_sr / step) * step
+
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0  # input position of buffer[0], always a multiple of step
+    emitted = 0  # output samples yielded so far
+    total = 0  # input samples read so far
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        total += len(block)
+        # Output before safe_end no longer depends on audio that has not been read yet.
+        safe_end = (total - margin) // step * step
+        if safe_end * out_step // step <= emitted:
+            continue
+        y = librosa.resample(buffer, orig_sr=orig_sr, target_sr=target_sr)
+        offset = buffer_start // step * out_step
+        yield y[emitted - offset:safe_end // step * out_step - offset]
+        emitted = safe_end // step * out_step
+        next_start = max(0, safe_end - margin)
+        buffer = buffer[next_start - buffer_start:]
+        buffer_start = next_start
+
+    if len(buffer):
+        y = librosa.resample(buffer, orig_sr=orig_sr, target_sr=target_sr)
+        tail = y[emitted - buffer_start // step * out_step:]
+        if len(tail):
+            yield tail
+
+
+class EnergySegmenter:
+    def __init__(
+            self,
+            sample_rate: int = SAMPLE_RATE,
+            threshold_db: float = -40.0,
+            hop_seconds: float = 0.02,
+            min_silence_seconds: float = 0.3,
+            min_segment_seconds: float = 2.0,
+            max_segment_seconds: float = 15.0
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.hop_size = max(1, int(hop_seconds * sample_rate))
+        self.min_silence_frames = max(1, round(min_silence_seconds / hop_seconds))
+        self.min_segment_frames = max(1, round(min_segment_seconds / hop_seconds))
+        self.max_segment_frames = max(self.min_segment_frames, round(max_segment_seconds / hop_seconds))
+
+    def _frame_levels(self, frames: np.ndarray) -> np.ndarray:
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        return 20.0 * np.log10(rms + 1e-10)
+
+    def segment(self, blocks: Iterable[np.ndarray]) -> Iterator[AudioSegment]:
+        carry = np.zeros(0, dtype=np.float32)
+        frames: List[np.ndarray] = []
+        levels: List[float] = []
+        segment_start = 0
+        silence_run = 0
+
+        for block in blocks:
+            data = np.concatenate([carry, block]) if len(carry) else block
+            frame_count = len(data) // self.hop_size
+            carry = data[frame_count * self.hop_size:]
+            if frame_count == 0:
+                continue
+            framed = data[:frame_count * self.hop_size].reshape(frame_count, self.hop_size)
+
+            for frame, level in zip(framed, self._frame_levels(framed)):
+                frames.append(frame)
+                levels.append(level)
+                silence_run = silence_run + 1 if level < self.threshold_db else 0
+
+                if silence_run >= self.min_silence_frames and len(frames) >= self.min_segment_frames:
+                    # Cut in the middle of the pause.
+                    cut = len(frames) - silence_run // 2
+                elif len(frames) >= self.max_segment_frames:
+                    # No pause long enough: cut at the quietest frame of the second half.
+                    half = len(frames) // 2
+                    cut = half + int(np.argmin(levels[half:])) + 1
+                else:
+                    continue
+
+                segment = self._make_segment(segment_start, frames[:cut], levels[:cut])
+                if segment is not None:
+                    yield segment
+                segment_start += cut * self.hop_size
+                frames, levels = frames[cut:], levels[cut:]
+                silence_run = 0
+                for remaining_level in reversed(levels):
+                    if remaining_level >= self.threshold_db:
+                        break
+                    silence_run += 1
+
+        if len(carry):
+            frames.append(carry)
+            levels.append(float(self._frame_levels(carry.reshape(1, -1))[0]))
+        segment = self._make_segment(segment_start, frames, levels)
+        if segment is not None:
+            yield segment
+
+    def _make_segment(self, start: int, frames: List[np.ndarray], levels: List[float]) -> Optional[AudioSegment]:
+        # Pure silence is dropped rather than sent to ASR.
+        if not frames or max(levels) < self.threshold_db:
+            return None
+        return AudioSegment(start, np.concatenate(frames))
@@ -0,0 +1,92 @@
+from typing import Dict, Hashable, List, Optional, Sequence
+
+
+class BitParallelPattern:
+    # One bit per pattern position, packed into a Python int, so each text token costs a handful of
+    # big-int operations instead of a row of the DP table. The masks are built once and reused for every text.
+    def __init__(self, pattern: Sequence[Hashable]) -> None:
+        self.length = len(pattern)
+        self.mask = (1 << self.length) - 1
+        self.high_bit = 1 << (self.length - 1) if self.length else 0
+        masks: Dict[Hashable, int] = {}
+        bit = 1
+        for token in pattern:
+            masks[token] = masks.get(token, 0) | bit
+            bit <<= 1
+        self.masks = masks
+
+    def lcs_length(self, text: Sequence[Hashable]) -> int:
+        # Allison-Dix / Hyyro: zero bits of V mark the pattern positions that extend the LCS.
+        if not self.length:
+            return 0
+        masks = self.masks
+        mask = self.mask
+        v = mask
+        for token in text:
+            u = v & masks.get(token, 0)
+            v = ((v + u) | (v - u)) & mask
+        return self.length - bin(v).count('1')
+
+    def edit_distance(self, text: Sequence[Hashable], cutoff: Optional[int] = None) -> int:
+        # Myers / Hyyro unit-cost Levenshtein distance between the whole pattern and the whole text.
+        # With a cutoff the scan stops once the distance must exceed it and returns a value above the cutoff;
+        # the last-row score changes by at most one per token, so score - remaining tokens is a lower bound.
+        if not self.length:
+            return len(text)
+        masks = self.masks
+        mask = self.mask
+        high_bit = self.high_bit
+        positive = mask
+        negative = 0
+        score = self.length
+        # slack = cutoff + remaining tokens; the scan can stop once score > slack. Without a cutoff it never does,
+        # as the distance is at most length + len(text).
+        slack = (cutoff if cutoff is not None else self.length + len(text)) + len(text)
+        for token in text:
+            slack -= 1
+            equal = masks.get(token, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | (~(horizontal | positive) & mask)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & high_bit:
+                score += 1
+            elif horizontal_negative & high_bit:
+                score -= 1
+            if score > slack:
+                return score - slack + cutoff  # type: ignore[operator]
+            horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+            horizontal_negative = (horizontal_negative << 1) & mask
+            positive = horizontal_negative | (~(vertical | horizontal_positive) & mask)
+            negative = horizontal_positive & vertical
+        return score
+
+    def end_scores(self, text: Sequence[Hashable], anchored: bool = False) -> List[int]:
+        # Myers search mode: the distance of the best match of the whole pattern ending after each text token.
+        # The start is free unless anchored, which pins it to the first token, as edit_distance does.
+        scores: List[int] = []
+        if not self.length:
+            return list(range(1, len(text) + 1)) if anchored else [0] * len(text)
+        masks = self.masks
+        mask = self.mask
+        high_bit = self.high_bit
+        carry = 1 if anchored else 0
+        positive = mask
+        negative = 0
+        score = self.length
+        for token in text:
+            equal = masks.get(token, 0)
+            vertical = equal | negative
+            horizontal = (((equal & positive) + positive) ^ positive) | equal
+            horizontal_positive = negative | (~(horizontal | positive) & mask)
+            horizontal_negative = positive & horizontal
+            if horizontal_positive & high_bit:
+                score += 1
+            elif horizontal_negative & high_bit:
+                score -= 1
+            horizontal_positive = ((horizontal_positive << 1) | carry) & mask
+            horizontal_negative = (horizontal_negative << 1) & mask
+            positive = horizontal_negative | (~(vertical | horizontal_positive) & mask)
+            negative = horizontal_positive & vertical
+            scores.append(score)
+        return scores
@@ -1,41 +1,60 @@
 import re
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List, Dict, Type
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, List, Dict, Optional, Pattern, Type
 
 from .ZhG2p import ZhG2p, split_string as zh_split_string
 
 
 class LanguageProcessor(ABC):
+    _WHITESPACE_PATTERN: Pattern[str] = re.compile(r'\s+')
+
     def __init__(self, language_code: str, allowed_chars: str) -> None:
         self.language_code = language_code.lower()
         self._allowed_chars = allowed_chars
+        self._disallowed_pattern: Pattern[str] = re.compile(rf'[^{allowed_chars}]')
 
     def clean_text(self, text: str) -> str:
-        cleaned = re.sub(rf'[^{self._allowed_chars}]', '', text)
-        return re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = self._disallowed_pattern.sub('', text)
+        return self._WHITESPACE_PATTERN.sub(' ', cleaned).strip()
 
     @abstractmethod
     def split_text(self, text: str) -> List[str]:
         pass
 
+    def tokenize(self, text: str) -> List[str]:
+        # Same tokens as split_text(clean_text(text)); whitespace never ends up inside a token,
+        # so it does not need to be normalised when only the tokens are wanted.
+        return self.split_text(self._disallowed_pattern.sub('', text))
+
     @abstractmethod
     def get_phonetic_list(self, text_list: List[str]) -> List[str]:
         pass
 
+    def get_phonetic_lists(self, text_lists: List[List[str]]) -> List[List[str]]:
+        return [self.get_phonetic_list(text_list) for text_list in text_lists]
+
 
 class ChineseProcessor(LanguageProcessor):
     _CHINESE_CHAR_RANGE: str = r'[\u4e00-\u9fa5]'
 
-    def __init__(self) -> None:
+    def __init__(self, include_tone: bool = False, convert_number: bool = False, g2p: Optional[ZhG2p] = None) -> None:
         super().__init__('zh', self._CHINESE_CHAR_RANGE)
-        self.g2p: ZhG2p = ZhG2p('mandarin')
+        self.g2p: ZhG2p = g2p if g2p is not None else ZhG2p('mandarin')
+        self.include_tone = include_tone
+        self.convert_number = convert_number
 
     def split_text(self, text: str) -> List[str]:
         return zh_split_string(text)
 
     def get_phonetic_list(self, text_list: List[str]) -> List[str]:
-        return self.g2p.convert_list(text_list).split(' ')
+        return self.get_phonetic_lists([text_list])[0]
+
+    def get_phonetic_lists(self, text_lists: List[List[str]]) -> List[List[str]]:
+        converted = self.g2p.convert_batch(text_lists, self.include_tone, self.convert_number)
+        # An empty text has always come back as [''], which callers treat as a non-empty result.
+        return [phonetic_list or [''] for phonetic_list in converted]
 
 
 class EnglishProcessor(LanguageProcessor):
@@ -56,6 +75,7 @@ class LyricData:
     text_list: List[str]
     phonetic_list: List[str]
     raw_text: str
+    phonetic_ids: array = field(default_factory=lambda: array('i'))  # phonetic_list interned by the matcher
 
 
 class ProcessorFactory:
@@ -65,11 +85,11 @@ class ProcessorFactory:
     }
 
     @classmethod
-    def create_processor(cls, language_code: str) -> LanguageProcessor:
+    def create_processor(cls, language_code: str, **options: Any) -> LanguageProcessor:
         code: str = language_code.lower()
         if code not in cls._PROCESSOR_MAP:
             raise ValueError(f"Unsupported language: {language_code}")
-        return cls._PROCESSOR_MAP[code]()
+        return cls._PROCESSOR_MAP[code](**options)
 
     @classmethod
     def get_supported_languages(cls) -> List[str]:
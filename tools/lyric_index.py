@@ -0,0 +1,80 @@
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .suffix_automaton import SuffixAutomaton
+
+WindowRange = Tuple[int, int]  # [first start, last start + 1)
+
+
+class LyricIndex:
+    # Posting lists of phonetic k-grams for one lyric. A k-gram shared by the ASR result and the lyric is a seed;
+    # seeds on the same diagonal (lyric position - ASR position) vote for the region the clip was sung from.
+    # Exact matches are looked up in a suffix automaton of the lyric instead.
+    GRAM_SIZE: int = 2
+    MIN_DIAGONAL_VOTES: int = 2
+    DIAGONAL_SLACK: int = 4  # indels the ASR result may have before the seed diagonal drifts
+
+    def __init__(self, phonetic_seq: Sequence[Hashable], gram_size: int = GRAM_SIZE) -> None:
+        self.gram_size = gram_size
+        self.length = len(phonetic_seq)
+        postings: Dict[Tuple[Hashable, ...], List[int]] = {}
+        sequence = list(phonetic_seq)
+        for position in range(len(sequence) - gram_size + 1):
+            postings.setdefault(tuple(sequence[position:position + gram_size]), []).append(position)
+        self.postings = postings
+        self.automaton = SuffixAutomaton(sequence)
+
+    def find_exact(self, input_seq: Sequence[Hashable]) -> int:
+        # First start of input_seq in the lyric, or -1; the same answer as scanning every offset.
+        return self.automaton.find(input_seq)
+
+    def exact_occurrences(self, input_seq: Sequence[Hashable]) -> List[int]:
+        # Every start, e.g. each repetition of a chorus.
+        return self.automaton.occurrences(input_seq)
+
+    def diagonal_votes(self, input_seq: Sequence[Hashable]) -> Counter:
+        sequence = list(input_seq)
+        gram_size = self.gram_size
+        postings = self.postings
+        votes: Counter = Counter()
+        for offset in range(len(sequence) - gram_size + 1):
+            for position in postings.get(tuple(sequence[offset:offset + gram_size]), ()):
+                votes[position - offset] += 1
+        return votes
+
+    def candidate_ranges(self, input_seq: Sequence[Hashable], window_size: int) -> Optional[List[WindowRange]]:
+        # Window starts worth scanning, merged into ranges; None when there are too few seeds to trust.
+        last_start = self.length - window_size
+        if last_start < 0:
+            return None
+        votes = self.diagonal_votes(input_seq)
+        diagonals = sorted(diagonal for diagonal, count in votes.items() if count >= self.MIN_DIAGONAL_VOTES)
+        if not diagonals:
+            return None
+
+        # A window starting at s covers the diagonal d when d + len(input) <= s + window_size and s <= d.
+        lead = max(0, window_size - len(input_seq)) + self.DIAGONAL_SLACK
+        ranges: List[WindowRange] = []
+        for diagonal in diagonals:
+            first = max(0, diagonal - lead)
+            end = min(last_start, diagonal + self.DIAGONAL_SLACK) + 1
+            if first >= end:
+                continue
+            if ranges and first <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+            else:
+                ranges.append((first, end))
+        return ranges or None
+
+    def seed_diagonals(self, input_seq: Sequence[Hashable], limit: int) -> List[int]:
+        # The best-voted diagonals, at most one per DIAGONAL_SLACK neighbourhood.
+        votes = self.diagonal_votes(input_seq)
+        ranked = sorted((diagonal for diagonal, count in votes.items() if count >= self.MIN_DIAGONAL_VOTES),
+                        key=lambda diagonal: (-votes[diagonal], diagonal))
+        chosen: List[int] = []
+        for diagonal in ranked:
+            if all(abs(diagonal - other) > self.DIAGONAL_SLACK for other in chosen):
+                chosen.append(diagonal)
+                if len(chosen) == limit:
+                    break
+        return chosen
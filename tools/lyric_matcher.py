@@ -1,11 +1,23 @@
 import glob
+import io
 import json
+import multiprocessing
 import os
+import re
+from array import array
+from collections import Counter
+from contextlib import redirect_stdout
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-from .language_processors import ProcessorFactory, LyricData
-from .sequence_aligner import SequenceAligner, calculate_difference_count, SmartHighlighter
+from .bit_parallel import BitParallelPattern
+from .language_processors import LanguageProcessor, ProcessorFactory, LyricData
+from .lyric_index import LyricIndex
+from .sequence_aligner import (MatchStrategy, SearchMode, SequenceAligner, Token, calculate_difference_count,
+                               SmartHighlighter)
+from .shared_matching import SharedLyricDict, attach_g2p, share_matching_tables
+from .shared_tables import SharedTables
+from .vocabulary import Vocabulary
 
 
 @dataclass
@@ -16,45 +28,78 @@ class ProcessResult:
     asr_phonetic: List[str]
     asr_text: List[str]
     reason: str
+    asr_phonetic_ids: array
+    matched_phonetic_ids: List[int]
+    search: str = ''  # SearchMode used to find the match, so workers can report it back
+    locality: str = ''  # 'local' when found near the previous slice, 'widened' when that was not good enough
+
+
+LabOutcome = Tuple[Optional[str], Optional[ProcessResult], str]  # read error, result, console output
 
 
 class LyricMatcher:
-    def __init__(self, language: str) -> None:
+    def __init__(
+            self,
+            language: str,
+            processor: Optional[LanguageProcessor] = None,
+            vocabulary: Optional[Vocabulary] = None
+    ) -> None:
         self.language = language.lower()
-        self.processor = ProcessorFactory.create_processor(language)
+        self.processor = processor or ProcessorFactory.create_processor(language)
         self.aligner = SequenceAligner()  # 合并后的对齐器
         self.highlighter = SmartHighlighter(self.aligner)  # 共享同一实例
+        self.vocabulary = vocabulary or Vocabulary()  # 歌词与 ASR 共用同一份词表，整数 id 才可比较
 
-    def process_lyric_file(self, lyric_path: str) -> LyricData:
+    @staticmethod
+    def read_lyric_file(lyric_path: str) -> str:
         try:
             with open(lyric_path, 'r', encoding='utf-8') as file:
-                raw_text = file.read()
+                return file.read()
         except Exception as error:
             raise IOError(f"Cannot read lyric file {lyric_path}: {str(error)}")
 
-        cleaned_text = self.processor.clean_text(raw_text)
-        text_list = self.processor.split_text(cleaned_text)
-        phonetic_list = self.processor.get_phonetic_list(text_list)
-        return LyricData(text_list, phonetic_list, cleaned_text)
+    def process_lyric_file(self, lyric_path: str) -> LyricData:
+        return self.process_lyric_texts([self.read_lyric_file(lyric_path)])[0]
+
+    def process_lyric_texts(self, raw_texts: List[str]) -> List[LyricData]:
+        cleaned_texts = [self.processor.clean_text(raw_text) for raw_text in raw_texts]
+        text_lists = [self.processor.split_text(cleaned_text) for cleaned_text in cleaned_texts]
+        phonetic_lists = self.processor.get_phonetic_lists(text_lists)
+        return [LyricData(text_list, phonetic_list, cleaned_text, self.vocabulary.encode(phonetic_list))
+                for text_list, phonetic_list, cleaned_text in zip(text_lists, phonetic_lists, cleaned_texts)]
 
     def process_asr_content(self, lab_content: str) -> Tuple[List[str], List[str]]:
-        cleaned_content = self.processor.clean_text(lab_content)
-        text_list = self.processor.split_text(cleaned_content)
-        phonetic_list = self.processor.get_phonetic_list(text_list)
-        return text_list, phonetic_list
+        return self.process_asr_contents([lab_content])[0]
+
+    def process_asr_contents(self, lab_contents: List[str]) -> List[Tuple[List[str], List[str]]]:
+        text_lists = [self.processor.tokenize(content) for content in lab_contents]
+        return list(zip(text_lists, self.processor.get_phonetic_lists(text_lists)))
 
     def align_lyric_with_asr(
             self,
-            asr_phonetic: List[str],
+            asr_phonetic_ids: array,
             lyric_text: List[str],
-            lyric_phonetic: List[str]
-    ) -> Tuple[str, str, str]:
-        matched_text, matched_phonetic, _, _, reason = self.aligner.find_best_match_and_return_lyrics(
-            input_pronunciation=asr_phonetic,
+            lyric_phonetic_ids: array,
+            lyric_index: Optional[LyricIndex] = None,
+            strategy: str = MatchStrategy.WINDOW,
+            region: Optional[Tuple[int, int]] = None
+    ) -> Tuple[str, List[int], str, int]:
+        # Returns the matched text, ids, failure reason and where the match ends in the lyric (-1 if none).
+        # A region restricts the search to lyric tokens [start, end); the whole-lyric index does not apply there.
+        offset = 0
+        if region is not None:
+            offset, region_end = region
+            lyric_text = lyric_text[offset:region_end]
+            lyric_phonetic_ids = lyric_phonetic_ids[offset:region_end]
+            lyric_index = None
+        matched_text, _, end, matched_ids, _, reason = self.aligner.find_best_match(
+            input_seq=asr_phonetic_ids,
+            reference_seq=lyric_phonetic_ids,
             reference_text=lyric_text,
-            reference_pronunciation=lyric_phonetic
+            index=lyric_index,
+            strategy=strategy
         )
-        return matched_text, matched_phonetic, reason
+        return matched_text, matched_ids or [], reason, end + offset if end != -1 else -1
 
     @staticmethod
     def save_to_json(json_path: str, text: str, phonetic: str) -> None:
@@ -74,6 +119,12 @@ class LyricMatchingPipeline:
     LYRIC_EXTENSION: str = ".txt"
     LAB_EXTENSION: str = ".lab"
     JSON_EXTENSION: str = ".json"
+    MAX_CHUNK_SIZE: int = 64
+    # Locality mode: the local region starts LOCAL_BACKTRACK tokens before the previous slice's match end and
+    # spans LOCAL_SPAN_SCALE clip lengths plus LOCAL_MARGIN tokens.
+    LOCAL_BACKTRACK: int = 8
+    LOCAL_SPAN_SCALE: float = 2.0
+    LOCAL_MARGIN: int = 16
 
     def __init__(
             self,
@@ -81,20 +132,35 @@ class LyricMatchingPipeline:
             lab_folder: str,
             json_folder: str,
             language: str,
-            diff_threshold: int = 5
+            diff_threshold: int = 5,
+            workers: int = 1,
+            matcher: Optional[LyricMatcher] = None,
+            use_index: bool = True,
+            strategy: str = MatchStrategy.WINDOW,
+            locality: bool = False,
+            locality_threshold: float = 0.3
     ) -> None:
         self.lyric_folder = lyric_folder
         self.lab_folder = lab_folder
         self.json_folder = json_folder
         self.language = language
         self.diff_threshold = diff_threshold
-        self.matcher = LyricMatcher(language)
+        self.workers = max(1, workers)
+        self.matcher = matcher or LyricMatcher(language)
+        self.use_index = use_index
+        self.strategy = strategy
+        self.locality = locality
+        self.locality_threshold = locality_threshold  # highest edit distance per clip token accepted locally
+        self.previous_ends: Dict[str, int] = {}  # lyric name -> match end of the latest slice
+        self.lyric_indexes: Dict[str, LyricIndex] = {}  # built once per lyric, on first use in workers
 
         self.total_files: int = 0
         self.success_count: int = 0
         self.diff_count: int = 0
         self.no_match_count: int = 0
         self.missing_lyrics: List[str] = []
+        self.search_counts: Counter = Counter()
+        self.locality_counts: Counter = Counter()
 
     def add_missing_lyric(self, lyric_name: str) -> None:
         if lyric_name not in self.missing_lyrics:
@@ -106,31 +172,81 @@ class LyricMatchingPipeline:
         print(f'{self.diff_count} files exceed difference threshold ({self.diff_threshold}).')
         print(f'Files with no match: {self.no_match_count}')
         print(f'Total files: {self.total_files}, successfully processed: {self.success_count}.')
+        if self.use_index:
+            self.print_index_report()
+        self.print_prune_report()
+        if self.locality:
+            self.print_locality_report()
+
+    def print_locality_report(self) -> None:
+        attempts = self.locality_counts['local'] + self.locality_counts['widened']
+        if attempts:
+            print(f"Locality: {self.locality_counts['local']} of {attempts} clips matched near the previous slice, "
+                  f"{self.locality_counts['widened']} widened to the whole lyric.")
+
+    def print_index_report(self) -> None:
+        searches = self.search_counts[SearchMode.INDEXED] + self.search_counts[SearchMode.FALLBACK]
+        if not searches:
+            return
+        fallbacks = self.search_counts[SearchMode.FALLBACK]
+        print(f'Lyric index: {searches} searches, {self.search_counts[SearchMode.EXACT]} exact matches, '
+              f'{fallbacks} fell back to a full scan ({fallbacks / searches:.1%}).')
+
+    def print_prune_report(self) -> None:
+        # Only the windows scored in this process; workers keep their own counts.
+        stats = self.matcher.aligner.prune_stats
+        if not stats['windows']:
+            return
+        print(f"Window pruning: {stats['windows']} candidate windows, {stats['overlap']} pruned by the overlap bound, "
+              f"{stats['lcs']} by the LCS bound, {stats['cutoff']} stopped at the cutoff, {stats['scored']} scored.")
+
+    def get_lyric_index(self, lyric_name: str, lyric_data: LyricData) -> Optional[LyricIndex]:
+        if not self.use_index:
+            return None
+        lyric_index = self.lyric_indexes.get(lyric_name)
+        if lyric_index is None:
+            lyric_index = LyricIndex(lyric_data.phonetic_ids)
+            self.lyric_indexes[lyric_name] = lyric_index
+        return lyric_index
 
     def load_all_lyrics(self) -> Dict[str, LyricData]:
         lyric_dict: Dict[str, LyricData] = {}
         lyric_pattern = f'{self.lyric_folder}/*{self.LYRIC_EXTENSION}'
+        raw_texts: Dict[str, str] = {}
         for lyric_path in glob.glob(lyric_pattern):
-            lyric_name = self._extract_filename_without_extension(lyric_path)
+            lyric_name = self.extract_filename_without_extension(lyric_path)
             try:
-                lyric_data = self.matcher.process_lyric_file(lyric_path)
-                if lyric_data:
-                    lyric_dict[lyric_name] = lyric_data
+                raw_texts[lyric_name] = self.matcher.read_lyric_file(lyric_path)
             except Exception as error:
                 print(f"Error processing lyric file {lyric_name}: {str(error)}")
+
+        try:
+            lyric_dict.update(zip(raw_texts, self.matcher.process_lyric_texts(list(raw_texts.values()))))
+        except Exception:
+            # One bad lyric fails the whole batch; redo them one by one so only that file is reported.
+            for lyric_name, raw_text in raw_texts.items():
+                try:
+                    lyric_dict[lyric_name] = self.matcher.process_lyric_texts([raw_text])[0]
+                except Exception as error:
+                    print(f"Error processing lyric file {lyric_name}: {str(error)}")
+        for lyric_name, lyric_data in lyric_dict.items():
+            self.get_lyric_index(lyric_name, lyric_data)
         print()
         return lyric_dict
 
+    def get_json_path(self, lab_name: str) -> str:
+        return f'{self.json_folder}/{lab_name}{self.JSON_EXTENSION}'
+
     @staticmethod
-    def _extract_filename_without_extension(file_path: str) -> str:
+    def extract_filename_without_extension(file_path: str) -> str:
         return os.path.splitext(os.path.basename(file_path))[0]
 
     def process_single_file(
             self,
             lab_path: str,
-            lyric_dict: Dict[str, LyricData]
+            lyric_dict: Mapping[str, LyricData]
     ) -> Optional[ProcessResult]:
-        lab_name = self._extract_filename_without_extension(lab_path)
+        lab_name = self.extract_filename_without_extension(lab_path)
         lyric_name = lab_name.rsplit("_", 1)[0]
 
         if lyric_name not in lyric_dict:
@@ -138,43 +254,107 @@ class LyricMatchingPipeline:
             print(f"Lab file: {lab_path}\nMissing lyric file: {lyric_name}")
             return None
 
+        lab_content = self.read_lab_file(lab_path)
+        if lab_content is None:
+            return None
+
+        return self.process_lab_content(lab_name, lab_content, lyric_dict[lyric_name])
+
+    def read_lab_file(self, lab_path: str) -> Optional[str]:
+        lab_content, error = self.read_lab(lab_path)
+        if error:
+            print(error)
+        return lab_content
+
+    def read_lab(self, lab_path: str) -> Tuple[Optional[str], Optional[str]]:
         try:
             with open(lab_path, 'r', encoding='utf-8') as file:
-                lab_content = file.read().strip()
+                return file.read().strip(), None
         except Exception as error:
-            print(f"Error reading lab file {lab_name}: {str(error)}")
-            return None
+            lab_name = self.extract_filename_without_extension(lab_path)
+            return None, f"Error reading lab file {lab_name}: {str(error)}"
 
-        lyric_data = lyric_dict[lyric_name]
+    def process_lab_content(
+            self,
+            lab_name: str,
+            lab_content: str,
+            lyric_data: LyricData
+    ) -> Optional[ProcessResult]:
         asr_text, asr_phonetic = self.matcher.process_asr_content(lab_content)
+        return self.match_asr_result(lab_name, asr_text, asr_phonetic, lyric_data)
 
+    def match_asr_result(
+            self,
+            lab_name: str,
+            asr_text: List[str],
+            asr_phonetic: List[str],
+            lyric_data: LyricData
+    ) -> Optional[ProcessResult]:
         if not asr_phonetic:
             print(f"Warning: ASR result empty {lab_name}")
             return None
 
-        matched_text, matched_phonetic, reason = self.matcher.align_lyric_with_asr(
-            asr_phonetic=asr_phonetic,
-            lyric_text=lyric_data.text_list,
-            lyric_phonetic=lyric_data.phonetic_list
-        )
+        asr_phonetic_ids = self.matcher.vocabulary.encode(asr_phonetic)
+        lyric_name = lab_name.rsplit("_", 1)[0]
+        locality = ''
+        if self.locality and lyric_name in self.previous_ends:
+            # Slices of a song follow each other in the lyric, so try just after the previous one first. The first
+            # slice of a song has nothing to follow and is searched in the whole lyric.
+            previous_end = self.previous_ends[lyric_name]
+            region = (max(0, previous_end - self.LOCAL_BACKTRACK),
+                      previous_end + int(len(asr_phonetic_ids) * self.LOCAL_SPAN_SCALE) + self.LOCAL_MARGIN)
+            matched_text, matched_ids, reason, match_end = self.matcher.align_lyric_with_asr(
+                asr_phonetic_ids=asr_phonetic_ids,
+                lyric_text=lyric_data.text_list,
+                lyric_phonetic_ids=lyric_data.phonetic_ids,
+                strategy=self.strategy,
+                region=region
+            )
+            locality = 'local' if self._is_confident(asr_phonetic_ids, matched_ids) else 'widened'
+
+        if locality != 'local':
+            matched_text, matched_ids, reason, match_end = self.matcher.align_lyric_with_asr(
+                asr_phonetic_ids=asr_phonetic_ids,
+                lyric_text=lyric_data.text_list,
+                lyric_phonetic_ids=lyric_data.phonetic_ids,
+                lyric_index=self.get_lyric_index(lyric_name, lyric_data),
+                strategy=self.strategy
+            )
+        if self.locality and match_end != -1:
+            self.previous_ends[lyric_name] = match_end
 
         return ProcessResult(
             lab_name=lab_name,
             matched_text=matched_text,
-            matched_phonetic=matched_phonetic,
+            matched_phonetic=" ".join(self.matcher.vocabulary.decode(matched_ids)),
             asr_phonetic=asr_phonetic,
             asr_text=asr_text,
-            reason=reason
+            reason=reason,
+            asr_phonetic_ids=asr_phonetic_ids,
+            matched_phonetic_ids=matched_ids,
+            search=self.matcher.aligner.last_search,
+            locality=locality
         )
 
+    def _is_confident(self, asr_phonetic_ids: array, matched_ids: List[int]) -> bool:
+        # Unit-cost edit distance per clip token, whatever costs the aligner uses.
+        if not matched_ids:
+            return False
+        cutoff = int(self.locality_threshold * len(asr_phonetic_ids))
+        return BitParallelPattern(asr_phonetic_ids).edit_distance(matched_ids, cutoff) <= cutoff
+
     def compare_and_save_result(self, result: ProcessResult) -> None:
+        self.search_counts[result.search] += 1
+        self.locality_counts[result.locality] += 1
         if not result.matched_text and not result.matched_phonetic:
             self._handle_no_match(result)
             return
 
+        source_sequence: Sequence[Token]
+        target_sequence: Sequence[Token]
         if self.language == 'zh':
-            source_sequence = result.asr_phonetic
-            target_sequence = result.matched_phonetic.split()
+            source_sequence = result.asr_phonetic_ids
+            target_sequence = result.matched_phonetic_ids
         else:
             source_sequence = result.asr_text
             target_sequence = result.matched_text.split()
@@ -186,15 +366,13 @@ class LyricMatchingPipeline:
                                       result.matched_phonetic, result.asr_phonetic)
             self.diff_count += 1
 
-        json_path = f'{self.json_folder}/{result.lab_name}{self.JSON_EXTENSION}'
-        self.matcher.save_to_json(json_path, result.matched_text, result.matched_phonetic)
+        self.matcher.save_to_json(self.get_json_path(result.lab_name), result.matched_text, result.matched_phonetic)
         self.success_count += 1
 
     def _handle_no_match(self, result: ProcessResult) -> None:
         self.no_match_count += 1
         self._display_no_match(result.lab_name, result.asr_phonetic, result.reason)
-        json_path = f'{self.json_folder}/{result.lab_name}{self.JSON_EXTENSION}'
-        self.matcher.save_to_json(json_path, "", "")
+        self.matcher.save_to_json(self.get_json_path(result.lab_name), "", "")
         self.success_count += 1
 
     def _display_differences(
@@ -226,16 +404,127 @@ class LyricMatchingPipeline:
         print(f"asr_result (全部多余): {asr_str}")
         print("-" * 80)
 
+    @classmethod
+    def extract_lyric_name(cls, lab_path: str) -> str:
+        return cls.extract_filename_without_extension(lab_path).rsplit("_", 1)[0]
+
+    @classmethod
+    def _natural_lab_key(cls, lab_path: str) -> Tuple[str, List[Any]]:
+        # Groups slices by song and orders them numerically: caocao_2 before caocao_10.
+        lab_name = cls.extract_filename_without_extension(lab_path)
+        parts = re.split(r'(\d+)', lab_name)
+        return lab_name.rsplit("_", 1)[0], [(0, int(part)) if part.isdigit() else (1, part) for part in parts]
+
+    def iter_lab_outcomes(
+            self,
+            lab_paths: List[str],
+            lyric_dict: Mapping[str, LyricData],
+            capture_output: bool = False
+    ) -> Iterator[LabOutcome]:
+        # Every lab is read first so the whole set goes through G2P in one batch; matching is lazy.
+        lab_reads = [self.read_lab(lab_path) for lab_path in lab_paths]
+        readable = [content for content, _ in lab_reads if content is not None]
+        asr_results = iter(self.matcher.process_asr_contents(readable))
+
+        for lab_path, (_, error) in zip(lab_paths, lab_reads):
+            if error:
+                yield error, None, ''
+                continue
+
+            lab_name = self.extract_filename_without_extension(lab_path)
+            lyric_data = lyric_dict[self.extract_lyric_name(lab_path)]
+            asr_text, asr_phonetic = next(asr_results)
+            if not capture_output:
+                yield None, self.match_asr_result(lab_name, asr_text, asr_phonetic, lyric_data), ''
+                continue
+            with redirect_stdout(io.StringIO()) as output:
+                result = self.match_asr_result(lab_name, asr_text, asr_phonetic, lyric_data)
+            yield None, result, output.getvalue()
+
+    def _iter_outcomes_in_workers(
+            self,
+            lab_paths: List[str],
+            lyric_dict: Dict[str, LyricData]
+    ) -> Iterator[LabOutcome]:
+        # Workers map the dictionaries and lyrics from shared memory instead of loading their own copies.
+        tables = share_matching_tables(self.matcher.processor, self.matcher.vocabulary, lyric_dict)
+        chunk_size = max(1, min(self.MAX_CHUNK_SIZE, len(lab_paths) // (self.workers * 4)))
+        chunks: List[List[str]] = []
+        for lab_path in lab_paths:
+            if self.locality:
+                # One chunk per song: its slices run in order in one worker, from the same state as in one process.
+                starts_chunk = not chunks or (
+                        self.extract_lyric_name(chunks[-1][-1]) != self.extract_lyric_name(lab_path))
+            else:
+                starts_chunk = not chunks or len(chunks[-1]) >= chunk_size
+            if starts_chunk:
+                chunks.append([lab_path])
+            else:
+                chunks[-1].append(lab_path)
+        try:
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(self.workers, initializer=_match_worker_init,
+                              initargs=(self.language, self.diff_threshold, self.use_index, self.strategy,
+                                        self.locality, self.locality_threshold, tables.name)) as pool:
+                for outcomes in pool.imap(_match_worker_run, chunks):
+                    yield from outcomes
+        finally:
+            tables.close()
+
     def execute(self) -> None:
         os.makedirs(self.json_folder, exist_ok=True)
         lyric_dict = self.load_all_lyrics()
         lab_pattern = f'{self.lab_folder}/*{self.LAB_EXTENSION}'
         asr_lab_files = glob.glob(lab_pattern)
+        if self.locality:
+            asr_lab_files.sort(key=self._natural_lab_key)
         self.total_files = len(asr_lab_files)
 
+        matched_paths = [lab_path for lab_path in asr_lab_files
+                         if self.extract_lyric_name(lab_path) in lyric_dict]
+        if self.workers > 1 and matched_paths:
+            outcomes = self._iter_outcomes_in_workers(matched_paths, lyric_dict)
+        else:
+            outcomes = self.iter_lab_outcomes(matched_paths, lyric_dict)
+
         for lab_path in asr_lab_files:
-            result = self.process_single_file(lab_path, lyric_dict)
-            if result:
+            lyric_name = self.extract_lyric_name(lab_path)
+            if lyric_name not in lyric_dict:
+                self.add_missing_lyric(lyric_name)
+                print(f"Lab file: {lab_path}\nMissing lyric file: {lyric_name}")
+                continue
+
+            error, result, output = next(outcomes)
+            print(output, end='')
+            if error:
+                print(error)
+            elif result:
                 self.compare_and_save_result(result)
 
         self.print_summary()
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _match_worker_init(language: str, diff_threshold: int, use_index: bool, strategy: str, locality: bool,
+                       locality_threshold: float, tables_name: str) -> None:
+    tables = SharedTables.attach(tables_name)
+    vocabulary = Vocabulary(tables['vocabulary'])  # type: ignore[arg-type]
+    g2p = attach_g2p(tables)
+    processor = ProcessorFactory.create_processor(language, **({'g2p': g2p} if g2p is not None else {}))
+    matcher = LyricMatcher(language, processor=processor, vocabulary=vocabulary)
+    _worker_state['tables'] = tables
+    _worker_state['pipeline'] = LyricMatchingPipeline(
+        lyric_folder='', lab_folder='', json_folder='', language=language,
+        diff_threshold=diff_threshold, matcher=matcher, use_index=use_index,
+        strategy=strategy, locality=locality, locality_threshold=locality_threshold
+    )
+    _worker_state['lyric_dict'] = SharedLyricDict(tables, vocabulary)
+
+
+def _match_worker_run(lab_paths: List[str]) -> List[LabOutcome]:
+    pipeline: LyricMatchingPipeline = _worker_state['pipeline']
+    # Whichever chunks this worker ran before, a song starts with no previous slice.
+    pipeline.previous_ends.clear()
+    return list(pipeline.iter_lab_outcomes(lab_paths, _worker_state['lyric_dict'], capture_output=True))
@@ -1,6 +1,11 @@
 from collections import Counter
 from enum import IntEnum
-from typing import List, Tuple, Optional
+from typing import List, Sequence, Tuple, Optional, Union
+
+from .bit_parallel import BitParallelPattern
+from .lyric_index import LyricIndex, WindowRange
+
+Token = Union[int, str]  # interned token ids in the matcher, plain strings elsewhere
 
 
 class EditOperation(IntEnum):
@@ -10,69 +15,89 @@ class EditOperation(IntEnum):
     INSERT = 3
 
 
+class SearchMode:
+    EXACT = 'exact'
+    INDEXED = 'indexed'
+    FALLBACK = 'fallback'  # an index was given but had too few seeds, so every window was scanned
+    FULL = 'full'
+
+
+class MatchStrategy:
+    WINDOW = 'window'  # score fixed-size windows, then align the best one
+    FITTING = 'fitting'  # one semi-global pass: the whole input against the best substring of the reference
+
+
+MATCH_STRATEGIES: Tuple[str, ...] = (MatchStrategy.WINDOW, MatchStrategy.FITTING)
+
+
 class SequenceAligner:
     OVERLAP_THRESHOLD = 0.3
+    MAX_SEED_DIAGONALS = 3
 
     def __init__(self, deletion_cost: int = 1, insertion_cost: int = 1, substitution_cost: int = 1) -> None:
         self.deletion_cost = deletion_cost
         self.insertion_cost = insertion_cost
         self.substitution_cost = substitution_cost
-
-    def compute_alignment(self, seq1: List[str], seq2: List[str]) -> Tuple[int, List[str], List[str]]:
+        self.last_search = ''  # SearchMode of the latest find_best_match call that got past the input checks
+        # How the window re-scoring disposed of candidates: 'windows' seen, pruned by the 'overlap' or 'lcs' lower
+        # bound, stopped at the 'cutoff', or 'scored' in full. Accumulates over calls.
+        self.prune_stats: Counter = Counter()
+
+    def compute_alignment(self, seq1: List[Token], seq2: List[Token]) -> Tuple[int, List[Token], List[Token]]:
+        # Two rolling rows of costs and one byte per cell for the backtrace (an EditOperation value), instead of
+        # two full matrices of Python objects. Row and column 0 need no backtrace entry: _backtrack walks them
+        # without looking.
         len1, len2 = len(seq1), len(seq2)
+        width = len2 + 1
+        bt = bytearray(width * (len1 + 1))  # zero is EditOperation.MATCH
+        substitute, delete, insert = EditOperation.SUBSTITUTE, EditOperation.DELETE, EditOperation.INSERT
 
-        dp = [[0] * (len2 + 1) for _ in range(len1 + 1)]
-        bt = [[EditOperation.MATCH] * (len2 + 1) for _ in range(len1 + 1)]
-
-        for i in range(1, len1 + 1):
-            dp[i][0] = i * self.deletion_cost
-            bt[i][0] = EditOperation.DELETE
-
-        for j in range(1, len2 + 1):
-            dp[0][j] = j * self.insertion_cost
-            bt[0][j] = EditOperation.INSERT
+        prev = [j * self.insertion_cost for j in range(width)]
+        curr = [0] * width
 
         for i in range(1, len1 + 1):
+            curr[0] = i * self.deletion_cost
             s1_char = seq1[i - 1]
-            for j in range(1, len2 + 1):
+            row = i * width
+            for j in range(1, width):
                 s2_char = seq2[j - 1]
 
                 if s1_char == s2_char:
-                    dp[i][j] = dp[i - 1][j - 1]
-                    bt[i][j] = EditOperation.MATCH
+                    curr[j] = prev[j - 1]
                 else:
-                    sub_cost = dp[i - 1][j - 1] + self.substitution_cost
-                    del_cost = dp[i - 1][j] + self.deletion_cost
-                    ins_cost = dp[i][j - 1] + self.insertion_cost
+                    sub_cost = prev[j - 1] + self.substitution_cost
+                    del_cost = prev[j] + self.deletion_cost
+                    ins_cost = curr[j - 1] + self.insertion_cost
 
                     min_cost = sub_cost
-                    op = EditOperation.SUBSTITUTE
+                    op = substitute
                     if del_cost < min_cost:
                         min_cost = del_cost
-                        op = EditOperation.DELETE
+                        op = delete
                     if ins_cost < min_cost:
                         min_cost = ins_cost
-                        op = EditOperation.INSERT
+                        op = insert
 
-                    dp[i][j] = min_cost
-                    bt[i][j] = op
+                    curr[j] = min_cost
+                    bt[row + j] = op
+            prev, curr = curr, prev
 
         aligned1, aligned2 = self._backtrack(seq1, seq2, bt)
-        return dp[len1][len2], aligned1, aligned2
+        return prev[len2], aligned1, aligned2
 
     @staticmethod
-    def _backtrack(seq1: List[str], seq2: List[str],
-                   bt: List[List[EditOperation]]) -> Tuple[List[str], List[str]]:
+    def _backtrack(seq1: List[Token], seq2: List[Token], bt: bytearray) -> Tuple[List[Token], List[Token]]:
         i, j = len(seq1), len(seq2)
+        width = j + 1
         max_len = i + j
-        res1: List[Optional[str]] = [None] * max_len
-        res2: List[Optional[str]] = [None] * max_len
+        res1: List[Optional[Token]] = [None] * max_len
+        res2: List[Optional[Token]] = [None] * max_len
         idx = max_len - 1
 
         while i > 0 or j > 0:
             if i > 0 and j > 0:
-                op = bt[i][j]
-                if op in (EditOperation.MATCH, EditOperation.SUBSTITUTE):
+                op = bt[i * width + j]
+                if op <= EditOperation.SUBSTITUTE:
                     res1[idx] = seq1[i - 1]
                     res2[idx] = seq2[j - 1]
                     i -= 1
@@ -98,8 +123,22 @@ class SequenceAligner:
         start = idx + 1
         return res1[start:], res2[start:]  # type: ignore
 
+    @property
+    def uniform_cost(self) -> Optional[int]:
+        # With one non-negative cost for every operation the distance is that cost times the Levenshtein distance,
+        # which the bit-parallel kernel computes. Other cost models use the DP.
+        if self.deletion_cost == self.insertion_cost == self.substitution_cost >= 0:
+            return self.substitution_cost
+        return None
+
+    @staticmethod
+    def compute_lcs_length(seq1: Sequence[Token], seq2: Sequence[Token]) -> int:
+        if len(seq1) < len(seq2):
+            seq1, seq2 = seq2, seq1
+        return BitParallelPattern(seq2).lcs_length(seq1)
+
     @staticmethod
-    def compute_lcs_length(seq1: List[str], seq2: List[str]) -> int:
+    def compute_lcs_length_dp(seq1: Sequence[Token], seq2: Sequence[Token]) -> int:
         if len(seq1) < len(seq2):
             seq1, seq2 = seq2, seq1
         m, n = len(seq1), len(seq2)
@@ -120,25 +159,34 @@ class SequenceAligner:
 
     def find_best_match(
             self,
-            input_seq: List[str],
-            reference_seq: List[str],
+            input_seq: Sequence[Token],
+            reference_seq: Sequence[Token],
             reference_text: Optional[List[str]] = None,
             max_window_scale: float = 1.3,
             extra_window: int = 8,
-    ) -> Tuple[str, int, int, Optional[List[str]], Optional[List[str]], str]:
+            index: Optional[LyricIndex] = None,
+            strategy: str = MatchStrategy.WINDOW,
+    ) -> Tuple[str, int, int, Optional[List[Token]], Optional[List[str]], str]:
+        self.last_search = ''
         if not input_seq:
             return "", -1, -1, None, None, "Input sequence is empty"
         if not reference_seq:
             return "", -1, -1, None, None, "Reference sequence is empty"
 
+        input_seq = list(input_seq)
+        reference_seq = list(reference_seq)
         input_len = len(input_seq)
         ref_len = len(reference_seq)
 
         if input_len > ref_len:
             return "", -1, -1, None, None, "Input longer than reference"
 
-        direct_start = self._find_exact_match(input_seq, reference_seq)
+        if index is not None:
+            direct_start = index.find_exact(input_seq)
+        else:
+            direct_start = self._find_exact_match(input_seq, reference_seq)
         if direct_start != -1:
+            self.last_search = SearchMode.EXACT
             return self._build_exact_match_result(
                 direct_start, input_len, reference_seq, reference_text
             )
@@ -147,7 +195,24 @@ class SequenceAligner:
             input_len, ref_len, max_window_scale, extra_window
         )
 
-        best_start, _ = self._scan_windows(input_seq, reference_seq, window_size, input_len)
+        if strategy == MatchStrategy.FITTING:
+            # The band allows as many extra reference tokens as the window would, plus the seed slack.
+            band = window_size - input_len + LyricIndex.DIAGONAL_SLACK
+            _, fit_start, fit_end = self._find_fitting_span(input_seq, reference_seq, index, band)
+            # The same overlap threshold the window scan applies, so both strategies reject the same clips.
+            if fit_start == -1 or self._overlap(input_seq, reference_seq[fit_start:fit_end]) < \
+                    self.OVERLAP_THRESHOLD * input_len:
+                return "", -1, -1, None, None, "No matching window found"
+            return self._build_match_from_alignment(
+                input_seq, reference_seq, reference_text, fit_start, fit_end - fit_start
+            )
+
+        ranges = index.candidate_ranges(input_seq, window_size) if index is not None else None
+        if ranges is not None:
+            self.last_search = SearchMode.INDEXED
+        else:
+            self.last_search = SearchMode.FULL if index is None else SearchMode.FALLBACK
+        best_start, _ = self._scan_windows(input_seq, reference_seq, window_size, input_len, ranges)
         if best_start == -1:
             return "", -1, -1, None, None, "No matching window found"
 
@@ -156,7 +221,7 @@ class SequenceAligner:
         )
 
     @staticmethod
-    def _find_exact_match(input_seq: List[str], reference_seq: List[str]) -> int:
+    def _find_exact_match(input_seq: Sequence[Token], reference_seq: Sequence[Token]) -> int:
         input_len = len(input_seq)
         ref_len = len(reference_seq)
         for start in range(ref_len - input_len + 1):
@@ -168,9 +233,9 @@ class SequenceAligner:
     def _build_exact_match_result(
             start: int,
             length: int,
-            reference_seq: List[str],
+            reference_seq: Sequence[Token],
             reference_text: Optional[List[str]],
-    ) -> Tuple[str, int, int, List[str], List[str], str]:
+    ) -> Tuple[str, int, int, List[Token], List[str], str]:
         end = start + length
         matched_phonetic_list = reference_seq[start:end]
         matched_text_list = reference_text[start:end] if reference_text else []
@@ -184,19 +249,49 @@ class SequenceAligner:
         window_size = min(input_len + extra_window, int(input_len * max_window_scale))
         return min(window_size, ref_len)
 
-    def compute_edit_distance(self, seq1: List[str], seq2: List[str]) -> int:
+    def compute_edit_distance(self, seq1: Sequence[Token], seq2: Sequence[Token], cutoff: Optional[int] = None) -> int:
+        # With a cutoff, a distance above it may be reported as any value above it.
+        cost = self.uniform_cost
+        if cost is None:
+            return self.compute_edit_distance_dp(seq1, seq2, cutoff)
+        if len(seq1) < len(seq2):
+            seq1, seq2 = seq2, seq1
+        return cost * BitParallelPattern(seq2).edit_distance(seq1, self._unit_cutoff(cutoff, cost))
+
+    @staticmethod
+    def _unit_cutoff(cutoff: Optional[int], cost: int) -> Optional[int]:
+        return cutoff // cost if cutoff is not None and cost else None
+
+    def compute_edit_distance_dp(
+            self, seq1: Sequence[Token], seq2: Sequence[Token], cutoff: Optional[int] = None
+    ) -> int:
         len1, len2 = len(seq1), len(seq2)
         if len1 < len2:
             seq1, seq2 = seq2, seq1
             len1, len2 = len2, len1
 
-        prev = [j * self.insertion_cost for j in range(len2 + 1)]
-        curr = [0] * (len2 + 1)
+        # Ukkonen's band: every insertion or deletion moves the path one diagonal, so a cell more than `reach`
+        # diagonals outside [-(len1 - len2), 0] needs more indels than the cutoff pays for.
+        # Cells outside the band are set to cutoff + 1: a path through them costs more than the cutoff anyway.
+        indel_cost = min(self.insertion_cost, self.deletion_cost)
+        reach = len1 + len2
+        outside = 0
+        if cutoff is not None:
+            outside = cutoff + 1
+            if indel_cost > 0:
+                reach = (cutoff // indel_cost - (len1 - len2)) // 2
+                if reach < 0:
+                    return outside
+
+        prev = [j * self.insertion_cost if j <= reach else outside for j in range(len2 + 2)]
+        curr = [outside] * (len2 + 2)
 
         for i in range(1, len1 + 1):
-            curr[0] = i * self.deletion_cost
+            low = max(1, i - (len1 - len2) - reach)
+            high = min(len2, i + reach)
+            curr[low - 1] = i * self.deletion_cost if low == 1 else outside
             s1 = seq1[i - 1]
-            for j in range(1, len2 + 1):
+            for j in range(low, high + 1):
                 s2 = seq2[j - 1]
                 if s1 == s2:
                     curr[j] = prev[j - 1]
@@ -205,73 +300,227 @@ class SequenceAligner:
                     dele = prev[j] + self.deletion_cost
                     ins = curr[j - 1] + self.insertion_cost
                     curr[j] = min(sub, dele, ins)
+            curr[high + 1] = outside
+            # Costs are non-negative and every path crosses every row, so the row minimum bounds the distance.
+            if cutoff is not None and min(curr[low - 1:high + 1]) > cutoff:
+                return outside
             prev, curr = curr, prev
         return prev[len2]
 
     def _scan_windows(
             self,
-            input_seq: List[str],
-            reference_seq: List[str],
+            input_seq: Sequence[Token],
+            reference_seq: Sequence[Token],
             window_size: int,
             input_len: int,
+            ranges: Optional[List[WindowRange]] = None,
     ) -> Tuple[int, float]:
         ref_len = len(reference_seq)
-        candidates = []  # (approx_dist, start)
+        if ranges is None:
+            ranges = [(0, ref_len - window_size + 1)]
+        candidates = []  # (overlap, start)
         input_freq = Counter(input_seq)
-
-        for start in range(ref_len - window_size + 1):
-            window = reference_seq[start:start + window_size]
-
-            if not any(c in input_freq for c in window):
-                continue
-
-            window_freq = Counter(window)
-            overlap = sum(min(input_freq[c], window_freq.get(c, 0)) for c in input_freq)
-            coverage = overlap / input_len
-            if coverage < self.OVERLAP_THRESHOLD:
-                continue
-
-            lcs_len = self.compute_lcs_length(input_seq, window)
-            approx_dist = len(input_seq) + len(window) - 2 * lcs_len
-            candidates.append((approx_dist, start))
+        pattern = BitParallelPattern(input_seq)  # masks are built once and reused for every window
+        cost = self.uniform_cost
+
+        # Rolling overlap: window_counts only tracks tokens of the input, and overlap is
+        # sum(min(input_freq[c], window_counts[c])), updated as one token enters and one leaves.
+        for first, end in ranges:
+            window_counts = dict.fromkeys(input_freq, 0)
+            overlap = 0
+            for token in reference_seq[first:first + window_size - 1]:
+                count = window_counts.get(token)
+                if count is not None:
+                    if count < input_freq[token]:
+                        overlap += 1
+                    window_counts[token] = count + 1
+
+            for start in range(first, end):
+                entering = reference_seq[start + window_size - 1]
+                count = window_counts.get(entering)
+                if count is not None:
+                    if count < input_freq[entering]:
+                        overlap += 1
+                    window_counts[entering] = count + 1
+                if start > first:
+                    leaving = reference_seq[start - 1]
+                    count = window_counts.get(leaving)
+                    if count is not None:
+                        if count <= input_freq[leaving]:
+                            overlap -= 1
+                        window_counts[leaving] = count - 1
+
+                if not overlap:
+                    continue
+
+                coverage = overlap / input_len
+                if coverage < self.OVERLAP_THRESHOLD:
+                    continue
+
+                candidates.append((overlap, start))
 
         if not candidates:
             return -1, float('inf')
 
-        candidates.sort(key=lambda x: x[0])
-
-        total = len(candidates)
-        num_to_keep = max(10, int(0.3 * total))
-        if num_to_keep > total:
-            num_to_keep = total
+        # Branch and bound over every candidate, best overlap first. The winner is the window with the lowest
+        # edit distance, ties going to the lower LCS estimate (approx_dist) and then the earlier start; a window
+        # is only skipped when a lower bound proves it cannot beat that.
+        candidates.sort(key=lambda x: (-x[0], x[1]))
+        stats = self.prune_stats
+        stats['windows'] += len(candidates)
 
         best_start = -1
+        best_key = (0, 0)  # (approx_dist, start) of the best window
         min_edit_dist = float('inf')
 
-        for approx_dist, start in candidates[:num_to_keep]:
+        for position, (overlap, start) in enumerate(candidates):
+            # Sorted by overlap, so once its bound is out of reach it is for every remaining window.
+            if self._edit_lower_bound(input_len, window_size, overlap) > min_edit_dist:
+                stats['overlap'] += len(candidates) - position
+                break
+
             window = reference_seq[start:start + window_size]
-            edit_dist = self.compute_edit_distance(input_seq, window)
-            if edit_dist < min_edit_dist:
+            lcs_len = pattern.lcs_length(window)
+            key = (input_len + window_size - 2 * lcs_len, start)
+            lower_bound = self._edit_lower_bound(input_len, window_size, lcs_len)
+            if lower_bound > min_edit_dist or (lower_bound == min_edit_dist and key > best_key):
+                stats['lcs'] += 1
+                continue
+
+            cutoff = None if best_start == -1 else int(min_edit_dist)
+            if cost is None:
+                edit_dist = self.compute_edit_distance_dp(input_seq, window, cutoff)
+            else:
+                edit_dist = cost * pattern.edit_distance(window, self._unit_cutoff(cutoff, cost))
+            if edit_dist < min_edit_dist or (edit_dist == min_edit_dist and key < best_key):
                 min_edit_dist = edit_dist
                 best_start = start
-                if edit_dist == 0:
-                    break
+                best_key = key
+                stats['scored'] += 1
+            else:
+                stats['cutoff' if cutoff is not None and edit_dist > cutoff else 'scored'] += 1
 
         return best_start, min_edit_dist
 
+    def _edit_lower_bound(self, input_len: int, window_len: int, common: int) -> int:
+        # Admissible bound from `common`, an upper bound on the matched tokens (multiset overlap or LCS length):
+        # the length difference needs that many insertions or deletions, and every other position that
+        # cannot be a match needs some operation.
+        indel_cost = max(0, min(self.deletion_cost, self.insertion_cost))
+        cheapest = max(0, min(indel_cost, self.substitution_cost))
+        return abs(input_len - window_len) * indel_cost + max(0, min(input_len, window_len) - common) * cheapest
+
+    @staticmethod
+    def _overlap(input_seq: Sequence[Token], window: Sequence[Token]) -> int:
+        return sum((Counter(input_seq) & Counter(window)).values())
+
+    def _find_fitting_span(
+            self,
+            input_seq: Sequence[Token],
+            reference_seq: Sequence[Token],
+            index: Optional[LyricIndex],
+            band: int,
+    ) -> Tuple[float, int, int]:
+        # Returns (cost, start, end) of the reference substring the whole input aligns to best.
+        diagonals = index.seed_diagonals(input_seq, self.MAX_SEED_DIAGONALS) if index is not None else []
+        if diagonals:
+            best = min(self.compute_fitting_span_dp(input_seq, reference_seq, diagonal, band)
+                       for diagonal in diagonals)
+            if best[1] != -1:
+                self.last_search = SearchMode.INDEXED
+                return best
+
+        self.last_search = SearchMode.FULL if index is None else SearchMode.FALLBACK
+        cost = self.uniform_cost
+        if cost is None:
+            return self.compute_fitting_span_dp(input_seq, reference_seq)
+        distance, start, end = self.compute_fitting_span(input_seq, reference_seq)
+        return cost * distance, start, end
+
+    @staticmethod
+    def compute_fitting_span(input_seq: Sequence[Token], reference_seq: Sequence[Token]) -> Tuple[int, int, int]:
+        # Unit costs: a forward search finds the earliest end of a best match, and an anchored search of the
+        # reversed input backwards from that end finds its start.
+        input_len = len(input_seq)
+        scores = BitParallelPattern(input_seq).end_scores(reference_seq)
+        if not scores:
+            return input_len, -1, -1
+        best = min(scores)
+        end = scores.index(best) + 1
+
+        # A match with distance `best` spans at most input_len + best reference tokens.
+        first = max(0, end - input_len - best)
+        reverse_scores = BitParallelPattern(input_seq[::-1]).end_scores(reference_seq[first:end][::-1], anchored=True)
+        # Among equally good starts keep the longest span, which leaves the alignment the most lyric tokens to use.
+        length = max((span for span, score in enumerate(reverse_scores, 1) if score == best), default=0)
+        return best, end - length, end
+
+    def compute_fitting_span_dp(
+            self,
+            input_seq: Sequence[Token],
+            reference_seq: Sequence[Token],
+            diagonal: Optional[int] = None,
+            band: int = 0,
+    ) -> Tuple[float, int, int]:
+        # Semi-global DP: starting and ending anywhere in the reference is free, and every cell carries the
+        # reference position its path started from. With a diagonal, only cells whose reference position lies
+        # within band of input position + diagonal are filled. The band is clamped to the reference, so input
+        # tokens sung before or after the lyric still reach its first or last column as deletions.
+        input_len, ref_len = len(input_seq), len(reference_seq)
+
+        def bounds(row: int) -> Tuple[int, int]:
+            if diagonal is None:
+                return 0, ref_len
+            return (min(ref_len, max(0, row + diagonal - band)),
+                    max(0, min(ref_len, row + diagonal + band)))
+
+        low, high = bounds(0)
+        costs: List[float] = [0] * (high - low + 1)
+        starts = list(range(low, high + 1))
+
+        for row in range(1, input_len + 1):
+            token = input_seq[row - 1]
+            row_low, row_high = bounds(row)
+            row_costs: List[float] = []
+            row_starts: List[int] = []
+            for column in range(row_low, row_high + 1):
+                best = float('inf')
+                start = -1
+                previous = column - 1 - low
+                if column > 0 and 0 <= previous < len(costs):
+                    if reference_seq[column - 1] == token:
+                        row_costs.append(costs[previous])
+                        row_starts.append(starts[previous])
+                        continue
+                    best = costs[previous] + self.substitution_cost
+                    start = starts[previous]
+                if 0 <= previous + 1 < len(costs) and costs[previous + 1] + self.deletion_cost < best:
+                    best = costs[previous + 1] + self.deletion_cost
+                    start = starts[previous + 1]
+                if column > row_low and row_costs[-1] + self.insertion_cost < best:
+                    best = row_costs[-1] + self.insertion_cost
+                    start = row_starts[-1]
+                row_costs.append(best)
+                row_starts.append(start)
+            low, costs, starts = row_low, row_costs, row_starts
+
+        best_cost = min(costs)
+        offset = costs.index(best_cost)
+        return best_cost, starts[offset], low + offset
+
     def _build_match_from_alignment(
             self,
-            input_seq: List[str],
-            reference_seq: List[str],
+            input_seq: Sequence[Token],
+            reference_seq: Sequence[Token],
             reference_text: Optional[List[str]],
             best_start: int,
             window_size: int,
-    ) -> Tuple[str, int, int, Optional[List[str]], Optional[List[str]], str]:
+    ) -> Tuple[str, int, int, Optional[List[Token]], Optional[List[str]], str]:
         window_end = best_start + window_size
         window_seq = reference_seq[best_start:window_end]
         _, aligned_input, aligned_window = self.compute_alignment(input_seq, window_seq)
 
-        matched_phonetic_list: List[str] = []
+        matched_phonetic_list: List[Token] = []
         matched_text_list: List[str] = []
         win_idx = 0
 
@@ -294,17 +543,19 @@ class SequenceAligner:
             input_pronunciation: List[str],
             reference_text: List[str],
             reference_pronunciation: List[str],
+            strategy: str = MatchStrategy.WINDOW,
     ) -> Tuple[str, str, int, int, str]:
         matched_text, start, end, matched_phonetic_list, _, reason = self.find_best_match(
             input_seq=input_pronunciation,
             reference_seq=reference_pronunciation,
             reference_text=reference_text,
+            strategy=strategy,
         )
         matched_phonetic = " ".join(matched_phonetic_list) if matched_phonetic_list else ""
         return matched_text, matched_phonetic, start, end, reason
 
 
-def calculate_difference_count(seq1: List[str], seq2: List[str]) -> int:
+def calculate_difference_count(seq1: Sequence[Token], seq2: Sequence[Token]) -> int:
     min_len = min(len(seq1), len(seq2))
     diff = sum(1 for a, b in zip(seq1[:min_len], seq2[:min_len]) if a != b)
     diff += abs(len(seq1) - len(seq2))
@@ -0,0 +1,78 @@
+from typing import Dict, Iterator, List, Mapping, Optional
+
+from .ZhG2p import ZhG2p
+from .language_processors import ChineseProcessor, LanguageProcessor, LyricData
+from .shared_tables import SharedIntLists, SharedStringList, SharedStringMap, SharedTables
+from .vocabulary import TokenView, Vocabulary
+
+G2P_TABLES = ('phrases_map', 'phrases_dict', 'word_dict', 'trans_dict')
+
+
+def share_matching_tables(
+        processor: LanguageProcessor,
+        vocabulary: Vocabulary,
+        lyric_dict: Dict[str, LyricData]
+) -> SharedTables:
+    # Everything a matching worker reads: the G2P dictionaries and the interned lyrics.
+    names = list(lyric_dict)
+    text_ids = [vocabulary.encode(lyric_dict[name].text_list) for name in names]
+    phonetic_ids = [lyric_dict[name].phonetic_ids for name in names]
+
+    maps = {}
+    if isinstance(processor, ChineseProcessor):
+        maps = {table: getattr(processor.g2p, table) for table in G2P_TABLES}
+
+    return SharedTables.create(
+        lists={
+            'vocabulary': vocabulary.tokens,
+            'lyric_names': names,
+            'raw_texts': [lyric_dict[name].raw_text for name in names],
+        },
+        ints={'text_ids': text_ids, 'phonetic_ids': phonetic_ids},
+        maps=maps
+    )
+
+
+class SharedLyricDict(Mapping[str, LyricData]):
+    # Builds LyricData on demand over the shared sequences, so a worker only holds the lyrics it touches.
+    def __init__(self, tables: SharedTables, vocabulary: Vocabulary) -> None:
+        names = tables['lyric_names']
+        assert isinstance(names, SharedStringList)
+        self._indices = {name: index for index, name in enumerate(names)}
+        self._raw_texts = tables['raw_texts']
+        self._text_ids = tables['text_ids']
+        self._phonetic_ids = tables['phonetic_ids']
+        assert isinstance(self._text_ids, SharedIntLists) and isinstance(self._phonetic_ids, SharedIntLists)
+        self._vocabulary = vocabulary
+        self._loaded: Dict[str, LyricData] = {}
+
+    def __getitem__(self, name: str) -> LyricData:
+        lyric_data = self._loaded.get(name)
+        if lyric_data is None:
+            index = self._indices[name]
+            tokens = self._vocabulary.tokens
+            phonetic_ids = self._phonetic_ids[index]
+            lyric_data = LyricData(
+                text_list=TokenView(self._text_ids[index], tokens),  # type: ignore[arg-type]
+                phonetic_list=TokenView(phonetic_ids, tokens),  # type: ignore[arg-type]
+                raw_text=self._raw_texts[index],  # type: ignore[arg-type]
+                phonetic_ids=phonetic_ids  # type: ignore[arg-type]
+            )
+            self._loaded[name] = lyric_data
+        return lyric_data
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._indices
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._indices)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+
+def attach_g2p(tables: SharedTables) -> Optional[ZhG2p]:
+    if not all(table in tables.tables for table in G2P_TABLES):
+        return None
+    maps: List[SharedStringMap] = [tables[table] for table in G2P_TABLES]  # type: ignore[misc]
+    return ZhG2p.from_tables(*maps)
@@ -0,0 +1,274 @@
+import struct
+import zlib
+from array import array
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, Union, overload
+
+LIST_SEPARATOR: str = '\x1f'
+
+
+def _pad(data: bytes) -> bytes:
+    # Keeps every section 4-byte aligned so int32 views can be cast in place.
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _pack_strings(strings: Iterable[str]) -> Tuple[bytes, bytes]:
+    offsets = array('i', [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets.tobytes(), _pad(bytes(blob))
+
+
+class SharedBlock:
+    # One read-only block of shared memory. The process that creates it owns it and unlinks it on close;
+    # attached processes only map it.
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool) -> None:
+        self.memory = memory
+        self.owner = owner
+
+    @classmethod
+    def create(cls, payload: bytes) -> 'SharedBlock':
+        memory = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+        memory.buf[:len(payload)] = payload
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedBlock':
+        # Worker processes share the owner's resource tracker, so the block is still unlinked exactly once.
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    @property
+    def buffer(self) -> memoryview:
+        return self.memory.buf
+
+    def close(self) -> None:
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class _SectionReader:
+    def __init__(self, buffer: memoryview) -> None:
+        self.buffer = buffer
+        self.position = 0
+
+    def ints(self, count: int) -> memoryview:
+        view = self.buffer[self.position:self.position + 4 * count].cast('i')
+        self.position += 4 * count
+        return view
+
+    def raw(self, size: int) -> memoryview:
+        view = self.buffer[self.position:self.position + size]
+        self.position += size + (-size % 4)
+        return view
+
+
+class SharedStringList(Sequence[str]):
+    # Strings stored as one UTF-8 blob plus an offset array; items are decoded on access.
+    _HEADER = struct.Struct('<ii')  # count, blob size
+
+    def __init__(self, block: SharedBlock, offset: int = 0) -> None:
+        self.block = block
+        count, blob_size = self._HEADER.unpack_from(block.buffer, offset)
+        reader = _SectionReader(block.buffer[offset + self._HEADER.size:])
+        self._offsets = reader.ints(count + 1)
+        self._blob = reader.raw(blob_size)
+        self._count = count
+
+    @classmethod
+    def pack(cls, strings: Sequence[str]) -> bytes:
+        offsets, blob = _pack_strings(strings)
+        return cls._HEADER.pack(len(strings), len(blob)) + offsets + blob
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def encoded(self, index: int) -> memoryview:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]]
+
+
+class SharedIntLists(Sequence[memoryview]):
+    # Int sequences stored back to back in one int32 section; items are zero-copy views.
+    _HEADER = struct.Struct('<ii')  # count, total length
+
+    def __init__(self, block: SharedBlock, offset: int = 0) -> None:
+        self.block = block
+        count, total = self._HEADER.unpack_from(block.buffer, offset)
+        reader = _SectionReader(block.buffer[offset + self._HEADER.size:])
+        self._offsets = reader.ints(count + 1)
+        self._data = reader.ints(total)
+        self._count = count
+
+    @classmethod
+    def pack(cls, sequences: Sequence[Sequence[int]]) -> bytes:
+        offsets = array('i', [0])
+        data = array('i')
+        for sequence in sequences:
+            data.extend(sequence)
+            offsets.append(len(data))
+        return cls._HEADER.pack(len(sequences), len(data)) + offsets.tobytes() + data.tobytes()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> memoryview:  # type: ignore[override]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._data[self._offsets[index]:self._offsets[index + 1]]
+
+
+class SharedStringMap(Mapping[str, Union[str, List[str]]]):
+    # Open-addressing hash table over two SharedStringLists. Python's str hash differs between processes,
+    # so slots are addressed with crc32 of the UTF-8 key. List values are joined with LIST_SEPARATOR.
+    _HEADER = struct.Struct('<iii')  # slot count, list values, keys size
+
+    def __init__(self, block: SharedBlock, offset: int = 0) -> None:
+        self.block = block
+        slot_count, list_values, keys_size = self._HEADER.unpack_from(block.buffer, offset)
+        position = offset + self._HEADER.size
+        self._slots = block.buffer[position:position + 4 * slot_count].cast('i')
+        self._mask = slot_count - 1
+        self._list_values = bool(list_values)
+        position += 4 * slot_count
+        self._keys = SharedStringList(block, position)
+        self._values = SharedStringList(block, position + keys_size)
+
+    @classmethod
+    def pack(cls, mapping: Mapping[str, Union[str, List[str]]]) -> bytes:
+        keys = list(mapping)
+        list_values = any(isinstance(value, list) for value in mapping.values())
+        values = [LIST_SEPARATOR.join(value) if isinstance(value, list) else value for value in mapping.values()]
+
+        slot_count = 8
+        while slot_count < 2 * len(keys):
+            slot_count *= 2
+        slots = array('i', [-1]) * slot_count
+        for index, key in enumerate(keys):
+            slot = zlib.crc32(key.encode('utf-8')) & (slot_count - 1)
+            while slots[slot] != -1:
+                slot = (slot + 1) & (slot_count - 1)
+            slots[slot] = index
+
+        packed_keys = SharedStringList.pack(keys)
+        return (cls._HEADER.pack(slot_count, int(list_values), len(packed_keys)) + slots.tobytes()
+                + packed_keys + SharedStringList.pack(values))
+
+    def _find(self, key: str) -> int:
+        encoded = key.encode('utf-8')
+        slot = zlib.crc32(encoded) & self._mask
+        while True:
+            index = self._slots[slot]
+            if index == -1 or self._keys.encoded(index) == encoded:
+                return index
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) != -1
+
+    def __getitem__(self, key: str) -> Union[str, List[str]]:
+        index = self._find(key) if isinstance(key, str) else -1
+        if index == -1:
+            raise KeyError(key)
+        value = self._values[index]
+        return value.split(LIST_SEPARATOR) if self._list_values else value
+
+    def get(self, key: str, default: Optional[Union[str, List[str]]] = None) -> Optional[Union[str, List[str]]]:
+        return self[key] if key in self else default
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+SharedTable = Union[SharedStringList, SharedIntLists, SharedStringMap]
+_TABLE_TYPES: Dict[str, Type[SharedTable]] = {
+    'list': SharedStringList,
+    'ints': SharedIntLists,
+    'map': SharedStringMap,
+}
+
+
+class SharedTables:
+    # Several named tables packed into one shared block; handles() is all a child needs to map them again.
+    _HEADER = struct.Struct('<i')  # directory size
+
+    def __init__(self, block: SharedBlock, tables: Dict[str, SharedTable]) -> None:
+        self.block = block
+        self.tables = tables
+
+    @classmethod
+    def create(cls, lists: Optional[Dict[str, Sequence[str]]] = None,
+               ints: Optional[Dict[str, Sequence[Sequence[int]]]] = None,
+               maps: Optional[Dict[str, Mapping[str, Union[str, List[str]]]]] = None) -> 'SharedTables':
+        sections: List[Tuple[str, str, bytes]] = []
+        for name, strings in (lists or {}).items():
+            sections.append((name, 'list', SharedStringList.pack(strings)))
+        for name, sequences in (ints or {}).items():
+            sections.append((name, 'ints', SharedIntLists.pack(sequences)))
+        for name, mapping in (maps or {}).items():
+            sections.append((name, 'map', SharedStringMap.pack(mapping)))
+
+        directory: List[str] = []
+        position = 0
+        for name, kind, payload in sections:
+            directory.append(f'{name}:{kind}:{position}')
+            position += len(payload)
+        packed_directory = SharedStringList.pack(directory)
+        payload = cls._HEADER.pack(len(packed_directory)) + packed_directory + b''.join(
+            section for _, _, section in sections)
+        # The owner only keeps the block alive; readers, the owner included, go through attach().
+        return cls(SharedBlock.create(payload), {})
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedTables':
+        block = SharedBlock.attach(name)
+        directory_size, = cls._HEADER.unpack_from(block.buffer, 0)
+        base = cls._HEADER.size + directory_size
+        tables: Dict[str, SharedTable] = {}
+        for entry in SharedStringList(block, cls._HEADER.size):
+            name, kind, position = entry.rsplit(':', 2)
+            tables[name] = _TABLE_TYPES[kind](block, base + int(position))
+        return cls(block, tables)
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    @property
+    def size(self) -> int:
+        return self.block.memory.size
+
+    def __getitem__(self, name: str) -> SharedTable:
+        return self.tables[name]
+
+    def close(self) -> None:
+        # Every table view must be released before the block can be closed.
+        self.tables = {}
+        self.block.close()
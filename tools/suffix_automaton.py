@@ -0,0 +1,92 @@
+from typing import Dict, Hashable, List, Optional, Sequence
+
+
+class SuffixAutomaton:
+    # The minimal automaton of all substrings of one token sequence, built in O(n). A pattern is a substring iff
+    # its transitions can be walked from the root, so the exact-match lookup costs O(len(pattern)) no matter how
+    # long the sequence is.
+    def __init__(self, sequence: Sequence[Hashable]) -> None:
+        self.size = len(sequence)
+        self.transitions: List[Dict[Hashable, int]] = [{}]
+        self.links: List[int] = [-1]
+        self.lengths: List[int] = [0]
+        self.first_ends: List[int] = [-1]  # end position of the first occurrence of the state's substrings
+        self.clones: List[bool] = [False]
+        self._children: Optional[List[List[int]]] = None
+
+        last = 0
+        for position, token in enumerate(sequence):
+            last = self._extend(last, token, position)
+
+    def _add_state(self, length: int, link: int, first_end: int, transitions: Dict[Hashable, int],
+                   clone: bool) -> int:
+        self.transitions.append(transitions)
+        self.links.append(link)
+        self.lengths.append(length)
+        self.first_ends.append(first_end)
+        self.clones.append(clone)
+        return len(self.lengths) - 1
+
+    def _extend(self, last: int, token: Hashable, position: int) -> int:
+        transitions, links, lengths = self.transitions, self.links, self.lengths
+        current = self._add_state(lengths[last] + 1, -1, position, {}, False)
+        state = last
+        while state != -1 and token not in transitions[state]:
+            transitions[state][token] = current
+            state = links[state]
+        if state == -1:
+            links[current] = 0
+            return current
+
+        target = transitions[state][token]
+        if lengths[state] + 1 == lengths[target]:
+            links[current] = target
+            return current
+
+        clone = self._add_state(lengths[state] + 1, links[target], self.first_ends[target],
+                                dict(transitions[target]), True)
+        while state != -1 and transitions[state].get(token) == target:
+            transitions[state][token] = clone
+            state = links[state]
+        links[target] = clone
+        links[current] = clone
+        return current
+
+    def _walk(self, pattern: Sequence[Hashable]) -> int:
+        transitions = self.transitions
+        state = 0
+        for token in pattern:
+            state = transitions[state].get(token, -1)
+            if state == -1:
+                break
+        return state
+
+    def find(self, pattern: Sequence[Hashable]) -> int:
+        # Start of the first occurrence, or -1.
+        state = self._walk(pattern)
+        if state == -1:
+            return -1
+        return self.first_ends[state] - len(pattern) + 1 if pattern else 0
+
+    def occurrences(self, pattern: Sequence[Hashable]) -> List[int]:
+        # Every start, in order. The end positions of a state's substrings are the first ends of the non-clone
+        # states in its subtree of the suffix-link tree.
+        state = self._walk(pattern)
+        if state == -1:
+            return []
+        if not pattern:
+            return list(range(self.size + 1))
+        if self._children is None:
+            self._children = [[] for _ in self.links]
+            for child, link in enumerate(self.links):
+                if link != -1:
+                    self._children[link].append(child)
+        starts = []
+        stack = [state]
+        while stack:
+            node = stack.pop()
+            if not self.clones[node]:
+                starts.append(self.first_ends[node] - len(pattern) + 1)
+            stack.extend(self._children[node])
+        starts.sort()
+        return starts
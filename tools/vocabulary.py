@@ -0,0 +1,62 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Union, overload
+
+
+class Vocabulary:
+    # Maps tokens to small ints once, so the matcher compares and hashes ints instead of strings.
+    TYPECODE: str = 'i'
+
+    def __init__(self, tokens: Optional[Iterable[str]] = None) -> None:
+        self._ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        for token in tokens or ():
+            self.intern(token)
+
+    @property
+    def tokens(self) -> List[str]:
+        return self._tokens
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._ids
+
+    def intern(self, token: str) -> int:
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = self._ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        return token_id
+
+    def encode(self, tokens: Iterable[str]) -> array:
+        ids = self._ids
+        intern = self.intern
+        return array(self.TYPECODE, [ids[token] if token in ids else intern(token) for token in tokens])
+
+    def decode(self, token_ids: Iterable[int]) -> List[str]:
+        tokens = self._tokens
+        return [tokens[token_id] for token_id in token_ids]
+
+
+class TokenView(Sequence[str]):
+    # Read-only token list backed by ids; tokens are looked up only when accessed.
+    def __init__(self, token_ids: Sequence[int], tokens: Sequence[str]) -> None:
+        self.token_ids = token_ids
+        self.tokens = tokens
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self.tokens[token_id] for token_id in self.token_ids[index]]
+        return self.tokens[self.token_ids[index]]